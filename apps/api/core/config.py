@@ -25,13 +25,25 @@ class Settings(BaseSettings):
     # Retrieval Configuration
     RERANKER_ENABLED: bool = True
     RERANKER_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANKER_BACKEND: str = "onnx"  # "onnx" (int8 ONNX Runtime) or "torch"
+    RERANKER_ONNX_FILE: str = "onnx/model_quint8_avx2.onnx"
     RETRIEVAL_K_BM25: int = 100
     RETRIEVAL_K_DENSE: int = 100
+    RETRIEVAL_DENSE_MIN_SIM: float = 0.0  # 0 disables the filter (deterministic dev vectors score ~0)
+    RETRIEVAL_DENSE_OVERFETCH: int = 1  # Dense over-fetch factor, trimmed by the min similarity
+    RETRIEVAL_MAX_CANDIDATES: int = 150
     RETRIEVAL_MMR_K: int = 40
     RETRIEVAL_FINAL_K: int = 8
     RETRIEVAL_MMR_LAMBDA: float = 0.7
+    RETRIEVAL_HNSW_EF_SEARCH: int = 40  # HNSW candidate list size (raised to the dense limit)
     CACHE_TTL_SECONDS: int = 3600
     
+    # Embedding Cache Configuration
+    EMBEDDING_CACHE_SIZE: int = 2048
+    EMBEDDING_CACHE_TTL_SECONDS: int = 600
+    CACHE_NAMESPACE: str = ""  # Change to invalidate cached embeddings (e.g. new model)
+    EMBEDDING_CACHE_DIR: str = "/var/cache/barta/emb"  # Shared embedding disk cache (empty disables)
+    
     # LLM Chat Configuration
     LLM_PROVIDER: str = "openai"
     LLM_MODEL: str = "gpt-4o-mini"
@@ -1,12 +1,25 @@
 """
 Database configuration and connection management
 """
+from functools import lru_cache
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+@lru_cache(maxsize=1)
+def get_engine() -> Engine:
+    """Process-wide engine shared by request sessions and retrieval queries"""
+    return create_engine(
+        settings.DATABASE_URL,
+        pool_size=20,
+        max_overflow=10,
+        pool_pre_ping=True,
+        pool_recycle=3600
+    )
+
+engine = get_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -4,6 +4,8 @@ FastAPI application entry point
 """
 import sys
 import os
+import logging
+from contextlib import asynccontextmanager
 
 # Add project root to Python path for package imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../'))
@@ -17,11 +19,47 @@ from routes.metrics import metrics_router
 from routes.search import search_router
 from routes.chat import chat_router
 from core.config import settings
+from retrieval.rerank import get_reranker
+
+try:
+    from packages.shared.llm import configure_llm, aclose_llm
+except ImportError:
+    from shared.llm import configure_llm, aclose_llm
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the reranker and LLM connection pools at startup so first requests skip the cold start"""
+    try:
+        import torch
+        # Default intra-op threads oversubscribe cores during batched pair inference
+        torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+    except ImportError:
+        pass  # ONNX-only installs have no torch thread pool to size
+    
+    try:
+        reranker = get_reranker()
+        if reranker.model:
+            reranker.model.predict([("warm", "up")], show_progress_bar=False)
+            logger.info("Reranker model warmed up")
+    except Exception as e:
+        logger.warning(f"Reranker warmup failed: {e}")
+    
+    # Chats share keep-alive connections (TLS, DNS, TCP setup paid once) until shutdown
+    configure_llm()
+    
+    yield
+    
+    await aclose_llm()
+
 
 app = FastAPI(
     title="Barta API",
     description="AI News Assistant API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -2,13 +2,51 @@
 
 import uuid
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
 
+# Cursor used when get_recent_messages starts from the latest message (BIGINT max)
+_MAX_MESSAGE_ID = 9223372036854775807
+
+# Message statements built once at import rather than per call
+_INSERT_MESSAGE_SQL = text("""
+    INSERT INTO messages (conversation_id, role, content)
+    VALUES (:conversation_id, :role, :content)
+    RETURNING id, created_at
+""")
+
+_BULK_INSERT_MESSAGES_SQL = text("""
+    INSERT INTO messages (conversation_id, role, content)
+    VALUES (:conversation_id, :role, :content)
+""")
+
+_RECENT_MESSAGES_SQL = text("""
+    SELECT id, role, content, created_at, COUNT(*) OVER() AS total
+    FROM messages
+    WHERE conversation_id = :conversation_id AND id < :before_id
+    ORDER BY id DESC
+    LIMIT :limit
+""")
+
+# Driver-level (psycopg pyformat) queries for the per-request chat reads
+_RECENT_MESSAGES_DRIVER_SQL = """
+    SELECT role, content
+    FROM messages
+    WHERE conversation_id = %(conversation_id)s
+    ORDER BY id DESC
+    LIMIT %(limit)s
+"""
+
+_SUMMARY_DRIVER_SQL = """
+    SELECT short_summary
+    FROM conversation_memory
+    WHERE conversation_id = %(conversation_id)s
+"""
+
 
 def start_conversation(db: Session) -> str:
     """
@@ -35,7 +73,7 @@ def start_conversation(db: Session) -> str:
         raise
 
 
-def append_message(db: Session, conversation_id: str, role: str, content: str) -> None:
+def append_message(db: Session, conversation_id: str, role: str, content: str) -> Dict[str, Any]:
     """
     Append a message to a conversation.
     
@@ -44,27 +82,29 @@ def append_message(db: Session, conversation_id: str, role: str, content: str) -
         conversation_id: UUID of the conversation
         role: Message role ('user' or 'assistant')
         content: Message content
+        
+    Returns:
+        Dictionary with the new message's 'id' and 'created_at'
     """
     try:
         # Validate role
         if role not in ['user', 'assistant', 'tool']:
             raise ValueError(f"Invalid role: {role}")
         
-        # Insert message
-        db.execute(
-            text("""
-                INSERT INTO messages (conversation_id, role, content)
-                VALUES (:conversation_id, :role, :content)
-            """),
+        # Insert message, reading back its generated columns in the same statement
+        result = db.execute(
+            _INSERT_MESSAGE_SQL,
             {
                 "conversation_id": conversation_id,
                 "role": role,
                 "content": content
             }
         )
+        message_id, created_at = result.fetchone()
         db.commit()
         
-        logger.debug(f"Appended {role} message to conversation {conversation_id}")
+        logger.debug(f"Appended {role} message {message_id} to conversation {conversation_id}")
+        return {"id": message_id, "created_at": created_at}
         
     except Exception as e:
         logger.error(f"Failed to append message: {e}")
@@ -72,17 +112,66 @@ def append_message(db: Session, conversation_id: str, role: str, content: str) -
         raise
 
 
-def get_recent_messages(db: Session, conversation_id: str, limit: int = 8) -> List[Dict[str, Any]]:
+def bulk_append_messages(db: Session, conversation_id: str, messages: List[Dict[str, str]]) -> None:
+    """
+    Append several messages to a conversation with one executemany and one commit.
+    
+    Args:
+        db: Database session
+        conversation_id: UUID of the conversation
+        messages: Message dicts with 'role' and 'content' keys, in conversation order
+    """
+    if not messages:
+        return
+    
+    try:
+        # Validate every role before writing anything
+        for message in messages:
+            if message['role'] not in ['user', 'assistant', 'tool']:
+                raise ValueError(f"Invalid role: {message['role']}")
+        
+        db.execute(
+            _BULK_INSERT_MESSAGES_SQL,
+            [
+                {
+                    "conversation_id": conversation_id,
+                    "role": message['role'],
+                    "content": message['content']
+                }
+                for message in messages
+            ]
+        )
+        db.commit()
+        
+        logger.debug(f"Appended {len(messages)} messages to conversation {conversation_id}")
+        
+    except Exception as e:
+        logger.error(f"Failed to append messages: {e}")
+        db.rollback()
+        raise
+
+
+def get_recent_messages(
+    db: Session,
+    conversation_id: str,
+    limit: int = 8,
+    before_id: Optional[int] = None
+) -> Tuple[List[Dict[str, Any]], int]:
     """
-    Get recent messages from a conversation.
+    Get recent messages from a conversation, with the count of messages before the cursor.
+    
+    Pages backwards by keyset: pass the 'id' of the oldest message already seen as
+    before_id to fetch the page preceding it.
     
     Args:
         db: Database session
         conversation_id: UUID of the conversation
         limit: Maximum number of messages to return
+        before_id: Only return messages with an id below this cursor (None for the latest)
         
     Returns:
-        List of message dictionaries with 'role' and 'content' keys
+        Tuple of (message dictionaries with 'id', 'role', 'content' and 'created_at'
+        keys, oldest first; total number of messages before the cursor)
     """
     try:
         # Validate UUID format first
@@ -91,32 +180,68 @@ def get_recent_messages(db: Session, conversation_id: str, limit: int = 8) -> Li
             uuid.UUID(conversation_id)
         except ValueError:
             logger.warning(f"Invalid UUID format for message retrieval: {conversation_id}")
-            return []
-            
+            return [], 0
+        
+        # The window count is taken before LIMIT, so the total costs no second query;
+        # it covers the messages before the cursor
         result = db.execute(
-            text("""
-                SELECT role, content, created_at
-                FROM messages 
-                WHERE conversation_id = :conversation_id
-                ORDER BY created_at DESC
-                LIMIT :limit
-            """),
+            _RECENT_MESSAGES_SQL,
             {
                 "conversation_id": conversation_id,
+                "before_id": before_id if before_id is not None else _MAX_MESSAGE_ID,
                 "limit": limit
             }
         )
         
+        rows = result.fetchall()
+        total = rows[0][4] if rows else 0
+        
         messages = []
-        for row in reversed(result.fetchall()):  # Reverse to get chronological order
+        for row in reversed(rows):  # Reverse to get chronological order
             messages.append({
-                "role": row[0],
-                "content": row[1],
-                "created_at": row[2]
+                "id": row[0],
+                "role": row[1],
+                "content": row[2],
+                "created_at": row[3]
             })
         
-        logger.debug(f"Retrieved {len(messages)} recent messages for conversation {conversation_id}")
-        return messages
+        logger.debug(f"Retrieved {len(messages)} of {total} messages for conversation {conversation_id}")
+        return messages, total
+        
+    except Exception as e:
+        logger.error(f"Failed to get recent messages: {e}")
+        db.rollback()  # Rollback transaction on error
+        return [], 0
+
+
+def get_recent_messages_raw(db: Session, conversation_id: str, limit: int = 8) -> List[Dict[str, str]]:
+    """
+    Get recent messages through the DB-API driver, skipping SQLAlchemy result processing.
+    
+    Hot-path variant of get_recent_messages for the chat endpoint (PostgreSQL only).
+    
+    Args:
+        db: Database session
+        conversation_id: UUID of the conversation
+        limit: Maximum number of messages to return
+        
+    Returns:
+        List of message dictionaries with 'role' and 'content' keys, oldest first
+    """
+    try:
+        uuid.UUID(conversation_id)
+    except ValueError:
+        logger.warning(f"Invalid UUID format for message retrieval: {conversation_id}")
+        return []
+    
+    try:
+        rows = db.connection().exec_driver_sql(
+            _RECENT_MESSAGES_DRIVER_SQL,
+            {"conversation_id": conversation_id, "limit": limit}
+        ).fetchall()
+        
+        # Reverse to get chronological order
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
         
     except Exception as e:
         logger.error(f"Failed to get recent messages: {e}")
@@ -124,6 +249,36 @@ def get_recent_messages(db: Session, conversation_id: str, limit: int = 8) -> Li
         return []
 
 
+def get_summary_raw(db: Session, conversation_id: str) -> Optional[str]:
+    """
+    Get the conversation summary through the DB-API driver (PostgreSQL only).
+    
+    Args:
+        db: Database session
+        conversation_id: UUID of the conversation
+        
+    Returns:
+        Summary text or None if no summary exists
+    """
+    try:
+        uuid.UUID(conversation_id)
+    except ValueError:
+        logger.warning(f"Invalid UUID format for summary retrieval: {conversation_id}")
+        return None
+    
+    try:
+        row = db.connection().exec_driver_sql(
+            _SUMMARY_DRIVER_SQL,
+            {"conversation_id": conversation_id}
+        ).fetchone()
+        return row[0] if row and row[0] else None
+        
+    except Exception as e:
+        logger.error(f"Failed to get summary: {e}")
+        db.rollback()  # Rollback transaction on error
+        return None
+
+
 def get_summary(db: Session, conversation_id: str) -> Optional[str]:
     """
     Get the summary for a conversation.
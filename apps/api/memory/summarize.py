@@ -1,8 +1,10 @@
 """Memory summarization functionality"""
 
+import functools
 import logging
 import sys
 import os
+import string
 from typing import List, Dict, Any
 
 # Import LLM module
@@ -15,6 +17,18 @@ from core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Common stop words excluded from key-term extraction
+_STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'about', 'what', 'how', 'when', 'where', 'why', 'who', 'which', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'can', 'this', 'that', 'these', 'those'})
+
+# Translation table that strips punctuation in a single pass
+_PUNCT_TABLE = str.maketrans('', '', string.punctuation)
+
+# Distinct texts whose key terms are kept; summaries are rebuilt every turn from the same recent messages
+_KEY_TERMS_CACHE_SIZE = 1024
+
+# Summary model bound once at import rather than looked up per summary
+_LLM_MODEL = settings.LLM_MODEL
+
 
 def summarize_short(messages: List[Dict[str, Any]]) -> str:
     """
@@ -69,7 +83,7 @@ Summary:"""
     # Get summary from LLM
     summary = complete(
         llm_messages,
-        model=settings.LLM_MODEL,
+        model=_LLM_MODEL,
         temperature=0.1,  # Low temperature for consistent summaries
         max_tokens=100    # Short summary
     )
@@ -150,16 +164,14 @@ def _create_simple_summary(messages: List[Dict[str, Any]]) -> str:
         return "New conversation started"
 
 
+@functools.lru_cache(maxsize=_KEY_TERMS_CACHE_SIZE)
 def _extract_key_terms(text: str) -> str:
-    """Extract key terms from text"""
-    # Remove common stop words and extract meaningful terms
-    stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'about', 'what', 'how', 'when', 'where', 'why', 'who', 'which', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'can', 'this', 'that', 'these', 'those'}
-    
-    # Clean and split text
-    words = text.lower().replace('?', '').replace('.', '').replace(',', '').split()
-    
-    # Filter out stop words and short words
-    key_words = [word for word in words if len(word) > 3 and word not in stop_words]
+    """Extract key terms from text (memoized, as the result depends only on text)"""
+    # Strip punctuation, then drop stop words and short words
+    key_words = [
+        word for word in text.translate(_PUNCT_TABLE).lower().split()
+        if len(word) > 3 and word not in _STOP_WORDS
+    ]
     
     # Take first few meaningful words
     if key_words:
@@ -4,72 +4,110 @@ import logging
 from typing import List, Dict, Any
 import numpy as np
 
+try:
+    import simsimd
+except ImportError:
+    simsimd = None  # Fall back to NumPy matrix-vector products
+
 logger = logging.getLogger(__name__)
 
+# Precompute the full candidate similarity matrix only while it stays this small
+SIM_MATRIX_MAX_BYTES = 8_000_000
+
 def mmr(candidates: List[Dict[str, Any]], query_vec: np.ndarray, lambda_: float, k: int) -> List[Dict[str, Any]]:
     """
     Apply Maximal Marginal Relevance (MMR) to select diverse candidates.
-    
+
     Args:
         candidates: List of candidate documents with 'vec' and 'score' fields
         query_vec: Query vector as numpy array
         lambda_: Trade-off parameter (0=diversity only, 1=relevance only)
         k: Number of candidates to select
-        
+
     Returns:
         List of selected candidates (k or fewer if candidates < k)
     """
     if not candidates:
         return []
-        
+
     if len(candidates) <= k:
         return candidates
-    
-    # Normalize query vector
-    query_vec = _normalize_vector(query_vec)
-    
-    # Ensure all candidate vectors are numpy arrays and normalized
-    for candidate in candidates:
-        if isinstance(candidate['vec'], list):
-            candidate['vec'] = np.array(candidate['vec'])
-        candidate['vec'] = _normalize_vector(candidate['vec'])
-    
-    selected = []
-    remaining = candidates.copy()
-    
-    # Select first document with highest relevance score
-    remaining.sort(key=lambda x: x['score'], reverse=True)
-    selected.append(remaining.pop(0))
-    
-    # Iteratively select remaining documents
-    while len(selected) < k and remaining:
-        best_mmr = -float('inf')
-        best_idx = -1
-        
-        for i, candidate in enumerate(remaining):
-            # Relevance term: cosine similarity to query
-            relevance = _cosine_similarity(candidate['vec'], query_vec)
-            
-            # Diversity term: max cosine similarity to already selected docs
-            max_similarity = 0.0
-            for selected_doc in selected:
-                similarity = _cosine_similarity(candidate['vec'], selected_doc['vec'])
-                max_similarity = max(max_similarity, similarity)
-            
-            # MMR score: λ * relevance - (1-λ) * max_similarity
-            mmr_score = lambda_ * relevance - (1 - lambda_) * max_similarity
-            
-            if mmr_score > best_mmr:
-                best_mmr = mmr_score
-                best_idx = i
-        
-        if best_idx >= 0:
-            selected.append(remaining.pop(best_idx))
-    
+
+    # Stack candidate vectors into one (N, d) matrix for the array implementation
+    vecs = np.vstack([np.asarray(c['vec'], dtype=np.float32) for c in candidates])
+    scores = np.fromiter((c['score'] for c in candidates), dtype=np.float64, count=len(candidates))
+    selected = [candidates[i] for i in mmr_matrix(vecs, scores, query_vec, lambda_, k)]
+
     logger.info(f"MMR selected {len(selected)} candidates from {len(candidates)} with λ={lambda_}")
     return selected
 
 
+def mmr_matrix(vecs: np.ndarray, scores: np.ndarray, query_vec: np.ndarray, lambda_: float, k: int) -> np.ndarray:
+    """
+    Apply Maximal Marginal Relevance (MMR) to a stacked candidate matrix.
+
+    Relevance is one matrix-vector product and diversity is updated per pick with
+    another (or read from a precomputed similarity matrix), so no Python loop runs
+    over candidates.
+
+    Args:
+        vecs: (N, d) candidate vectors, normalized here
+        scores: (N,) retrieval scores; the highest-scoring candidate is picked first
+        query_vec: Query vector as numpy array
+        lambda_: Trade-off parameter (0=diversity only, 1=relevance only)
+        k: Number of candidates to select
+
+    Returns:
+        Indices into vecs of the selected candidates, in selection order
+    """
+    n = len(vecs)
+    if n <= k:
+        return np.arange(n)
+
+    # Order by score so the first pick and argmax ties match a stable sort
+    order = np.argsort(-np.asarray(scores), kind='stable')
+
+    # Normalize all rows at once
+    matrix = np.ascontiguousarray(np.asarray(vecs, dtype=np.float32)[order])
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True).clip(min=1e-12)
+
+    # Relevance term: cosine similarity of every candidate to the query
+    query_vec = _normalize_vector(np.asarray(query_vec).astype(np.float32, copy=False))
+    relevance = _dot_rows(matrix, query_vec)
+
+    # Pairwise similarities in one matrix product when small enough, else per pick
+    sim_matrix = None
+    if n * n * matrix.itemsize <= SIM_MATRIX_MAX_BYTES:
+        sim_matrix = matrix @ matrix.T
+
+    # Diversity term: running max similarity to selected docs (floored at 0)
+    max_sims = np.zeros(n, dtype=np.float32)
+    selected_mask = np.zeros(n, dtype=bool)
+
+    # Select first document with highest relevance score
+    last_idx = 0
+    selected_mask[last_idx] = True
+    selected_idx = [last_idx]
+
+    # Iteratively select remaining documents
+    while len(selected_idx) < k:
+        if sim_matrix is not None:
+            last_sims = sim_matrix[:, last_idx]
+        else:
+            last_sims = _dot_rows(matrix, matrix[last_idx])
+        np.maximum(max_sims, last_sims, out=max_sims)
+
+        # MMR score: λ * relevance - (1-λ) * max_similarity
+        mmr_scores = lambda_ * relevance - (1 - lambda_) * max_sims
+        mmr_scores[selected_mask] = -np.inf
+
+        last_idx = int(np.argmax(mmr_scores))
+        selected_mask[last_idx] = True
+        selected_idx.append(last_idx)
+
+    return order[selected_idx]
+
+
 def _normalize_vector(vec: np.ndarray) -> np.ndarray:
     """Normalize vector to unit length"""
     norm = np.linalg.norm(vec)
@@ -78,7 +116,8 @@ def _normalize_vector(vec: np.ndarray) -> np.ndarray:
     return vec / norm
 
 
-def _cosine_similarity(vec1: np.ndarray, vec2: np.ndarray) -> float:
-    """Compute cosine similarity between two vectors"""
-    # Vectors should already be normalized
-    return float(np.dot(vec1, vec2))
\ No newline at end of file
+def _dot_rows(matrix: np.ndarray, vec: np.ndarray) -> np.ndarray:
+    """Dot product of every matrix row with vec (cosine for unit vectors)"""
+    if simsimd is not None:
+        return np.asarray(simsimd.cdist(matrix, vec[None, :], metric='dot')).ravel()
+    return matrix @ vec
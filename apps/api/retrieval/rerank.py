@@ -2,12 +2,40 @@
 
 import logging
 import hashlib
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 import redis
 from core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Prometheus cache metrics live with the search routes, which import this module;
+# resolved on first use so import order cannot leave them unbound
+_search_metrics = None
+
+# Cross-encoder input limits: tokens per pair, pairs per batch, and passage
+# characters kept before tokenization (the tail past max_length is discarded)
+RERANK_MAX_LENGTH = 256
+RERANK_BATCH_SIZE = 32
+RERANK_MAX_CHARS = 1500
+
+# Passages scoring below this fraction of the top retrieval score skip the
+# cross-encoder and are ranked after every reranked passage
+RERANK_SCORE_CUTOFF = 0.15
+
+
+def _get_search_metrics():
+    """Return the routes.search metrics module, importing it on first use (None if unavailable)"""
+    global _search_metrics
+    if _search_metrics is None:
+        try:
+            from routes import search
+        except ImportError:
+            return None  # Metrics not available
+        _search_metrics = search
+    return _search_metrics
+
+
 class Reranker:
     """Cross-encoder reranker with Redis caching"""
     
@@ -25,7 +53,7 @@ class Reranker:
         """Initialize the cross-encoder model"""
         try:
             from sentence_transformers import CrossEncoder
-            self.model = CrossEncoder(settings.RERANKER_MODEL)
+            self.model = self._load_cross_encoder(CrossEncoder)
             logger.info(f"Loaded reranker model: {settings.RERANKER_MODEL}")
         except ImportError as e:
             logger.warning(f"sentence-transformers not available: {e}. Reranking disabled.")
@@ -34,6 +62,21 @@ class Reranker:
             logger.error(f"Failed to load reranker model: {e}. Reranking disabled.")
             self.enabled = False
     
+    def _load_cross_encoder(self, cross_encoder_cls):
+        """Load the cross-encoder, preferring the int8 ONNX Runtime backend"""
+        if settings.RERANKER_BACKEND == "onnx":
+            try:
+                return cross_encoder_cls(
+                    settings.RERANKER_MODEL,
+                    max_length=RERANK_MAX_LENGTH,
+                    backend="onnx",
+                    model_kwargs={"file_name": settings.RERANKER_ONNX_FILE}
+                )
+            except Exception as e:
+                logger.warning(f"ONNX reranker backend unavailable: {e}. Falling back to PyTorch.")
+        
+        return cross_encoder_cls(settings.RERANKER_MODEL, max_length=RERANK_MAX_LENGTH)
+    
     def _init_redis(self):
         """Initialize Redis connection for caching"""
         try:
@@ -62,13 +105,18 @@ class Reranker:
                 passage['rerank_score'] = passage.get('score', 0.0)
             return sorted(passages, key=lambda x: x.get('score', 0), reverse=True)
         
-        # Try to get cached scores
+        # Drop long-tail passages from the cross-encoder batch
+        to_rerank, skipped = self._split_by_score_cutoff(passages)
+        
+        # Try to get cached scores; the query hash is shared by every cache key
         cache_hits = 0
         cache_misses = 0
         uncached_passages = []
+        query_hash = _hash_query(query)
+        
+        cached_scores = self._get_cached_scores(query_hash, [p['chunk_id'] for p in to_rerank])
         
-        for passage in passages:
-            cached_score = self._get_cached_score(query, passage['chunk_id'])
+        for passage, cached_score in zip(to_rerank, cached_scores):
             if cached_score is not None:
                 passage['rerank_score'] = cached_score
                 cache_hits += 1
@@ -80,13 +128,13 @@ class Reranker:
         if uncached_passages and self.model:
             try:
                 # Prepare query-passage pairs for the model
-                pairs = [(query, passage['content']) for passage in uncached_passages]
-                scores = self.model.predict(pairs)
+                pairs = [(query, passage['content'][:RERANK_MAX_CHARS]) for passage in uncached_passages]
+                scores = self.model.predict(pairs, batch_size=RERANK_BATCH_SIZE, show_progress_bar=False)
                 
                 # Assign scores and cache them
                 for passage, score in zip(uncached_passages, scores):
                     passage['rerank_score'] = float(score)
-                    self._cache_score(query, passage['chunk_id'], float(score))
+                self._cache_scores(query_hash, [(p['chunk_id'], p['rerank_score']) for p in uncached_passages])
                 
                 logger.info(f"Reranked {len(uncached_passages)} passages")
                 
@@ -95,53 +143,75 @@ class Reranker:
                 for passage in uncached_passages:
                     passage['rerank_score'] = passage.get('score', 0.0)
         
+        # Rank skipped passages below every reranked one, preserving their order
+        if skipped:
+            floor = min(p['rerank_score'] for p in to_rerank) - 1.0
+            for passage in skipped:
+                passage['rerank_score'] = floor + passage.get('score', 0.0)
+            logger.info(f"Skipped reranking {len(skipped)} low-scoring passages")
+        
         # Log and track cache performance
         if self.redis_client:
             logger.info(f"Reranker cache: {cache_hits} hits, {cache_misses} misses")
             
             # Update Prometheus metrics
-            try:
-                from routes.search import increment_cache_hits, increment_cache_misses
-                for _ in range(cache_hits):
-                    increment_cache_hits()
-                for _ in range(cache_misses):
-                    increment_cache_misses()
-            except ImportError:
-                pass  # Metrics not available
+            search_metrics = _get_search_metrics()
+            if search_metrics is not None:
+                search_metrics.increment_cache_hits(cache_hits)
+                search_metrics.increment_cache_misses(cache_misses)
         
         # Sort by rerank_score descending
         return sorted(passages, key=lambda x: x['rerank_score'], reverse=True)
     
-    def _get_cache_key(self, query: str, chunk_id: int) -> str:
-        """Generate cache key for query-chunk pair"""
-        query_hash = hashlib.sha256(query.encode()).hexdigest()[:16]
+    def _split_by_score_cutoff(self, passages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Split passages into those worth reranking and low-score tail passages"""
+        top_score = max(p.get('score', 0.0) for p in passages)
+        if top_score <= 0:
+            return passages, []
+        
+        cutoff = top_score * RERANK_SCORE_CUTOFF
+        to_rerank = [p for p in passages if p.get('score', 0.0) >= cutoff]
+        skipped = [p for p in passages if p.get('score', 0.0) < cutoff]
+        return to_rerank, skipped
+    
+    def _get_cache_key(self, query: str, chunk_id: int, query_hash: Optional[str] = None) -> str:
+        """Generate cache key for query-chunk pair, reusing query_hash if given"""
+        if query_hash is None:
+            query_hash = _hash_query(query)
         return f"rrank:{query_hash}:{chunk_id}"
     
-    def _get_cached_score(self, query: str, chunk_id: int) -> Optional[float]:
-        """Get cached rerank score"""
-        if not self.redis_client:
-            return None
+    def _get_cached_scores(self, query_hash: str, chunk_ids: List[int]) -> List[Optional[float]]:
+        """Get cached rerank scores for all chunks with a single MGET"""
+        if not self.redis_client or not chunk_ids:
+            return [None] * len(chunk_ids)
         
         try:
-            key = self._get_cache_key(query, chunk_id)
-            cached = self.redis_client.get(key)
-            if cached:
-                return float(cached.decode())
+            keys = [f"rrank:{query_hash}:{chunk_id}" for chunk_id in chunk_ids]
+            cached = self.redis_client.mget(keys)
+            return [float(value.decode()) if value else None for value in cached]
         except Exception as e:
-            logger.warning(f"Failed to get cached score: {e}")
+            logger.warning(f"Failed to get cached scores: {e}")
         
-        return None
+        return [None] * len(chunk_ids)
     
-    def _cache_score(self, query: str, chunk_id: int, score: float):
-        """Cache rerank score"""
-        if not self.redis_client:
+    def _cache_scores(self, query_hash: str, scores: List[Tuple[int, float]]):
+        """Cache rerank scores in one pipelined round trip"""
+        if not self.redis_client or not scores:
             return
         
         try:
-            key = self._get_cache_key(query, chunk_id)
-            self.redis_client.setex(key, self.cache_ttl, str(score))
+            pipe = self.redis_client.pipeline(transaction=False)
+            for chunk_id, score in scores:
+                pipe.setex(f"rrank:{query_hash}:{chunk_id}", self.cache_ttl, str(score))
+            pipe.execute()
         except Exception as e:
-            logger.warning(f"Failed to cache score: {e}")
+            logger.warning(f"Failed to cache scores: {e}")
+
+
+@lru_cache(maxsize=8192)
+def _hash_query(query: str) -> str:
+    """Hash the query text for use in rerank cache keys (memoized for repeat queries)"""
+    return hashlib.blake2b(query.encode(), digest_size=8).hexdigest()
 
 
 # Global reranker instance
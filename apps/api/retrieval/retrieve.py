@@ -3,10 +3,15 @@
 import logging
 import sys
 import os
-from typing import List, Dict, Any
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
 import numpy as np
-from sqlalchemy import create_engine, text
+import orjson
+import redis
+from sqlalchemy import text
 from core.config import settings
+from core.db import get_engine
 from .mmr import mmr
 from .rerank import get_reranker
 
@@ -21,8 +26,85 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
-# Database engine for retrieval
-engine = create_engine(settings.DATABASE_URL)
+# Shared database engine, sized for concurrent BM25 + dense searches
+engine = get_engine()
+
+# SQL statements built once at import so SQLAlchemy reuses their compiled form
+_BM25_SQL = text("""
+SELECT 
+    ac.id as chunk_id,
+    ac.article_id,
+    ac.position,
+    ac.content,
+    ts_rank(ac.tsv, plainto_tsquery('simple', :query)) as score,
+    a.title,
+    a.url,
+    a.published_at,
+    a.source_domain
+FROM article_chunks ac
+JOIN articles a ON ac.article_id = a.id
+WHERE ac.tsv @@ plainto_tsquery('simple', :query)
+ORDER BY score DESC
+LIMIT :limit
+""")
+
+# The query is cast to halfvec to match the column type so the vector index is used
+_DENSE_SQL = text("""
+SELECT 
+    ac.id as chunk_id,
+    ac.article_id,
+    ac.position,
+    ac.content,
+    1 - (ac.embedding <=> CAST(:query_vec AS halfvec(3072))) as score,
+    a.title,
+    a.url,
+    a.published_at,
+    a.source_domain
+FROM article_chunks ac
+JOIN articles a ON ac.article_id = a.id
+WHERE ac.embedding IS NOT NULL
+  AND 1 - (ac.embedding <=> CAST(:query_vec AS halfvec(3072))) > :min_sim
+ORDER BY ac.embedding <=> CAST(:query_vec AS halfvec(3072))
+LIMIT :limit
+""")
+
+# Transaction-local HNSW search breadth for the dense query
+_EF_SEARCH_SQL = text("SELECT set_config('hnsw.ef_search', :ef_search, true)")
+
+_EMBEDDINGS_SQL = text("""
+SELECT id, embedding
+FROM article_chunks
+WHERE id = ANY(:ids) AND embedding IS NOT NULL
+""")
+
+# Worker threads that run BM25 search alongside dense search
+_search_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="bm25-search")
+
+# Redis client for the query result cache (connected lazily on first use)
+_redis_client = None
+_redis_initialized = False
+
+# Retrieval settings bound once at import; they are read on every request
+_K_BM25 = settings.RETRIEVAL_K_BM25
+_K_DENSE = settings.RETRIEVAL_K_DENSE
+_DENSE_MIN_SIM = settings.RETRIEVAL_DENSE_MIN_SIM
+# Dense search over-fetches by this factor, relying on the similarity threshold to trim it
+_DENSE_OVERFETCH = settings.RETRIEVAL_DENSE_OVERFETCH
+_MAX_CANDIDATES = settings.RETRIEVAL_MAX_CANDIDATES
+_MMR_LAMBDA = settings.RETRIEVAL_MMR_LAMBDA
+_MMR_K = settings.RETRIEVAL_MMR_K
+_FINAL_K = settings.RETRIEVAL_FINAL_K
+_CACHE_TTL_SECONDS = settings.CACHE_TTL_SECONDS
+_HNSW_EF_SEARCH = settings.RETRIEVAL_HNSW_EF_SEARCH
+
+# Fields returned by hybrid_search; internal fields such as vectors are dropped
+_OUT_KEYS = (
+    "chunk_id", "article_id", "position", "content", "score", "rerank_score",
+    "title", "url", "published_at", "source_domain", "source",
+)
+
+# Cached results carry datetimes and NumPy scores; orjson encodes both natively
+_CACHE_DUMPS_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
 
 def bm25_search(query: str, limit: int) -> List[Dict[str, Any]]:
     """
@@ -35,28 +117,9 @@ def bm25_search(query: str, limit: int) -> List[Dict[str, Any]]:
     Returns:
         List of dictionaries with chunk and article metadata
     """
-    sql = """
-    SELECT 
-        ac.id as chunk_id,
-        ac.article_id,
-        ac.position,
-        ac.content,
-        ac.embedding,
-        ts_rank(ac.tsv, plainto_tsquery('simple', :query)) as score,
-        a.title,
-        a.url,
-        a.published_at,
-        a.source_domain
-    FROM article_chunks ac
-    JOIN articles a ON ac.article_id = a.id
-    WHERE ac.tsv @@ plainto_tsquery('simple', :query)
-    ORDER BY score DESC
-    LIMIT :limit
-    """
-    
     try:
         with engine.connect() as conn:
-            result = conn.execute(text(sql), {"query": query, "limit": limit})
+            result = conn.execute(_BM25_SQL, {"query": query, "limit": limit})
             rows = result.fetchall()
             
         candidates = []
@@ -66,7 +129,6 @@ def bm25_search(query: str, limit: int) -> List[Dict[str, Any]]:
                 "article_id": row.article_id,
                 "position": row.position,
                 "content": row.content,
-                "embedding": row.embedding,
                 "score": float(row.score),
                 "title": row.title,
                 "url": row.url,
@@ -83,39 +145,30 @@ def bm25_search(query: str, limit: int) -> List[Dict[str, Any]]:
         return []
 
 
-def dense_search(query_vec: List[float], limit: int) -> List[Dict[str, Any]]:
+def dense_search(query_vec: np.ndarray, limit: int, min_sim: float = 0.0) -> List[Dict[str, Any]]:
     """
     Perform dense vector search using pgvector.
     
     Args:
         query_vec: Query embedding vector
         limit: Maximum number of results to return
+        min_sim: Minimum cosine similarity for a chunk to be returned (0 or below disables)
         
     Returns:
         List of dictionaries with chunk and article metadata
     """
-    sql = """
-    SELECT 
-        ac.id as chunk_id,
-        ac.article_id,
-        ac.position,
-        ac.content,
-        ac.embedding,
-        1 - (ac.embedding <=> :query_vec) as score,
-        a.title,
-        a.url,
-        a.published_at,
-        a.source_domain
-    FROM article_chunks ac
-    JOIN articles a ON ac.article_id = a.id
-    WHERE ac.embedding IS NOT NULL
-    ORDER BY ac.embedding <=> :query_vec
-    LIMIT :limit
-    """
-    
     try:
         with engine.connect() as conn:
-            result = conn.execute(text(sql), {"query_vec": query_vec, "limit": limit})
+            # HNSW returns at most ef_search rows, so never search narrower than the limit
+            conn.execute(_EF_SEARCH_SQL, {"ef_search": str(max(_HNSW_EF_SEARCH, limit))})
+            # Plain floats bind as a float8[] parameter, which the query casts to halfvec;
+            # a min_sim of 0 or below disables the filter (cosine never drops below -1)
+            params = {
+                "query_vec": np.asarray(query_vec, dtype=np.float32).tolist(),
+                "limit": limit,
+                "min_sim": min_sim if min_sim > 0 else -2.0
+            }
+            result = conn.execute(_DENSE_SQL, params)
             rows = result.fetchall()
     except Exception as e:
         logger.error(f"Dense vector search failed: {e}")
@@ -128,7 +181,6 @@ def dense_search(query_vec: List[float], limit: int) -> List[Dict[str, Any]]:
             "article_id": row.article_id,
             "position": row.position,
             "content": row.content,
-            "embedding": row.embedding,
             "score": float(row.score),
             "title": row.title,
             "url": row.url,
@@ -141,6 +193,40 @@ def dense_search(query_vec: List[float], limit: int) -> List[Dict[str, Any]]:
     return candidates
 
 
+def fetch_embeddings(chunk_ids: List[int]) -> Dict[int, np.ndarray]:
+    """
+    Fetch stored embeddings for a set of chunks in a single query.
+    
+    Args:
+        chunk_ids: IDs of the chunks to fetch embeddings for
+        
+    Returns:
+        Mapping of chunk_id to float32 embedding vector
+    """
+    if not chunk_ids:
+        return {}
+    
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(_EMBEDDINGS_SQL, {"ids": list(chunk_ids)})
+            rows = result.fetchall()
+    except Exception as e:
+        logger.error(f"Embedding fetch failed: {e}")
+        return {}
+    
+    embeddings = {}
+    for row in rows:
+        embedding = row.embedding
+        if isinstance(embedding, str):
+            # pgvector text format: "[0.1,0.2,...]"
+            embeddings[row.id] = np.fromstring(embedding.strip("[]"), sep=",", dtype=np.float32)
+        else:
+            embeddings[row.id] = np.asarray(embedding, dtype=np.float32)
+    
+    logger.info(f"Fetched {len(embeddings)} embeddings for {len(chunk_ids)} candidates")
+    return embeddings
+
+
 def _normalize_scores(candidates: List[Dict[str, Any]], source_key: str) -> List[Dict[str, Any]]:
     """Normalize scores to 0-1 range using min-max scaling"""
     source_candidates = [c for c in candidates if c["source"] == source_key]
@@ -148,17 +234,17 @@ def _normalize_scores(candidates: List[Dict[str, Any]], source_key: str) -> List
     if not source_candidates:
         return candidates
     
-    scores = [c["score"] for c in source_candidates]
-    min_score = min(scores)
-    max_score = max(scores)
+    scores = np.fromiter((c["score"] for c in source_candidates), dtype=np.float64, count=len(source_candidates))
+    min_score, max_score = scores.min(), scores.max()
     
     # Avoid division by zero
     if max_score == min_score:
-        for candidate in source_candidates:
-            candidate["score"] = 1.0
+        normalized = np.ones_like(scores)
     else:
-        for candidate in source_candidates:
-            candidate["score"] = (candidate["score"] - min_score) / (max_score - min_score)
+        normalized = (scores - min_score) / (max_score - min_score)
+    
+    for candidate, score in zip(source_candidates, normalized.tolist()):
+        candidate["score"] = score
     
     return candidates
 
@@ -200,20 +286,31 @@ def hybrid_search(query: str) -> List[Dict[str, Any]]:
     if not query.strip():
         return []
     
+    # Serve repeated queries straight from the result cache
+    cached_results = _get_cached_results(query)
+    if cached_results is not None:
+        logger.info(f"Hybrid search cache hit for: {query[:100]}...")
+        return cached_results
+    
     logger.info(f"Starting hybrid search for: {query[:100]}...")
     
     # Step 1: Get query embedding
     try:
         query_embeddings = embed_texts([query])
         query_vec = query_embeddings[0]
-        query_vec_np = np.array(query_vec)
+        query_vec_np = np.asarray(query_vec, dtype=np.float32)
     except Exception as e:
         logger.error(f"Failed to embed query: {e}")
         return []
     
-    # Step 2: Perform BM25 and dense search
-    bm25_results = bm25_search(query, settings.RETRIEVAL_K_BM25)
-    dense_results = dense_search(query_vec, settings.RETRIEVAL_K_DENSE)
+    # Step 2: Perform BM25 and dense search concurrently
+    bm25_future = _search_executor.submit(bm25_search, query, _K_BM25)
+    dense_results = dense_search(
+        query_vec,
+        _K_DENSE * _DENSE_OVERFETCH,
+        _DENSE_MIN_SIM
+    )
+    bm25_results = bm25_future.result()
     
     # Step 3: Merge and deduplicate candidates
     merged_candidates = _merge_candidates(bm25_results, dense_results)
@@ -222,22 +319,54 @@ def hybrid_search(query: str) -> List[Dict[str, Any]]:
         logger.info("No candidates found")
         return []
     
+    # Keep only the best-scoring candidates to bound MMR work
+    if len(merged_candidates) > _MAX_CANDIDATES:
+        merged_candidates.sort(key=lambda x: x["score"], reverse=True)
+        merged_candidates = merged_candidates[:_MAX_CANDIDATES]
+    
+    # Step 3b: Fetch embeddings only for the merged candidate set
+    embeddings = fetch_embeddings([c["chunk_id"] for c in merged_candidates])
+    for candidate in merged_candidates:
+        if candidate.get("embedding") is None:
+            candidate["embedding"] = embeddings.get(candidate["chunk_id"])
+    
     # Step 4: Prepare candidates for MMR (ensure vectors are numpy arrays)
+    have_vec = []
+    need_vec = []
     for candidate in merged_candidates:
-        if candidate["embedding"]:
-            candidate["vec"] = np.array(candidate["embedding"])
+        embedding = candidate.get("embedding")
+        if embedding is not None and len(embedding) > 0:
+            candidate["vec"] = np.asarray(embedding, dtype=np.float32)
+            have_vec.append(candidate)
         else:
-            # Fallback to zero vector if no embedding
-            candidate["vec"] = np.zeros(len(query_vec))
+            need_vec.append(candidate)
+    
+    # Embed BM25-only candidates without stored embeddings in one batch
+    unembedded = []
+    if need_vec:
+        try:
+            vectors = embed_texts([c["content"][:512] for c in need_vec])
+            for candidate, vector in zip(need_vec, vectors):
+                candidate["vec"] = np.asarray(vector, dtype=np.float32)
+            have_vec.extend(need_vec)
+        except Exception as e:
+            logger.warning(f"Failed to embed {len(need_vec)} candidates, skipping MMR for them: {e}")
+            unembedded = need_vec
     
     # Step 5: Apply MMR for diversity
     mmr_candidates = mmr(
-        merged_candidates, 
+        have_vec, 
         query_vec_np, 
-        settings.RETRIEVAL_MMR_LAMBDA, 
-        settings.RETRIEVAL_MMR_K
+        _MMR_LAMBDA, 
+        _MMR_K
     )
     
+    # Candidates that could not be embedded fill any remaining slots by score
+    if unembedded:
+        unembedded.sort(key=lambda x: x["score"], reverse=True)
+        open_slots = max(0, _MMR_K - len(mmr_candidates))
+        mmr_candidates = mmr_candidates + unembedded[:open_slots]
+    
     logger.info(f"MMR selected {len(mmr_candidates)} candidates")
     
     # Step 6: Apply reranking
@@ -245,17 +374,71 @@ def hybrid_search(query: str) -> List[Dict[str, Any]]:
     reranked_candidates = reranker.rerank(query, mmr_candidates)
     
     # Step 7: Take top K results
-    final_results = reranked_candidates[:settings.RETRIEVAL_FINAL_K]
+    final_results = reranked_candidates[:_FINAL_K]
+    
+    # Project results onto the output schema, dropping internal vector fields
+    final_results = [{k: r[k] for k in _OUT_KEYS if k in r} for r in final_results]
     
-    # Clean up results (remove internal fields)
-    for result in final_results:
-        result.pop("vec", None)
-        result.pop("embedding", None)
+    if final_results:
+        _cache_results(query, final_results)
     
     logger.info(f"Hybrid search returned {len(final_results)} final results")
     return final_results
 
 
+def _get_redis() -> Optional[redis.Redis]:
+    """Get the Redis client for result caching, or None if unavailable"""
+    global _redis_client, _redis_initialized
+    if not _redis_initialized:
+        _redis_initialized = True
+        try:
+            client = redis.from_url(settings.REDIS_URL)
+            client.ping()
+            _redis_client = client
+            logger.info("Redis connection established for search result caching")
+        except Exception as e:
+            logger.warning(f"Redis connection failed: {e}. Search result caching disabled.")
+    return _redis_client
+
+
+def _get_query_cache_key(query: str) -> str:
+    """Generate cache key for a query, normalizing case and whitespace"""
+    normalized = " ".join(query.lower().split())
+    return f"hs:{hashlib.sha256(normalized.encode()).hexdigest()[:32]}"
+
+
+def _get_cached_results(query: str) -> Optional[List[Dict[str, Any]]]:
+    """Get cached hybrid search results for a query"""
+    client = _get_redis()
+    if not client:
+        return None
+    
+    try:
+        cached = client.get(_get_query_cache_key(query))
+        if cached:
+            return orjson.loads(cached)
+    except Exception as e:
+        logger.warning(f"Failed to get cached search results: {e}")
+    
+    return None
+
+
+def _cache_results(query: str, results: List[Dict[str, Any]]):
+    """Cache hybrid search results for a query"""
+    client = _get_redis()
+    if not client:
+        return
+    
+    try:
+        client.setex(
+            _get_query_cache_key(query),
+            _CACHE_TTL_SECONDS,
+            orjson.dumps(results, option=_CACHE_DUMPS_OPTIONS)
+        )
+    except Exception as e:
+        logger.warning(f"Failed to cache search results: {e}")
+
+
 def format_passages(passages: List[Dict[str, Any]]) -> tuple[str, List[Dict[str, Any]]]:
     """
     Format passages for use in LLM prompts and return sources for citations.
@@ -1,11 +1,14 @@
 """Chat API endpoints with SSE streaming"""
 
-import json
 import time
 import logging
 import os
+import re
 import sys
+from functools import lru_cache, partial
 from typing import Optional, Dict, Any, List
+import anyio
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, validator
@@ -15,15 +18,15 @@ from prometheus_client import Histogram, Counter
 # Import LLM module
 try:
     sys.path.append(os.path.join(os.path.dirname(__file__), '../../../'))
-    from packages.shared.llm import stream_chat, complete
+    from packages.shared.llm import astream_chat, complete
 except ImportError:
-    from shared.llm import stream_chat, complete
+    from shared.llm import astream_chat, complete
 
 from core.config import settings
 from core.db import get_db
 from memory.store import (
-    start_conversation, append_message, get_recent_messages,
-    get_summary, set_summary, conversation_exists
+    start_conversation, append_message, get_recent_messages_raw,
+    get_summary_raw, set_summary, conversation_exists
 )
 from memory.summarize import summarize_short
 from retrieval.retrieve import hybrid_search, format_passages
@@ -42,6 +45,18 @@ answers_streamed_counter = Counter(
     'Total number of answers streamed'
 )
 
+# Prompt template directories, resolved once at import
+_LOCAL_PROMPTS_DIR = os.path.join(os.path.dirname(__file__), '../shared/prompts')
+_PACKAGES_PROMPTS_DIR = os.path.join(os.path.dirname(__file__), '../../../packages/shared/prompts')
+
+# Pre-encoded SSE framing for the per-token hot path
+_DELTA_PREFIX = b"event: delta\ndata: "
+_SSE_SUFFIX = b"\n\n"
+
+# Citation markers like [1] and a Sources heading, matched without lowercasing the answer
+_CITE_RE = re.compile(r'\[\d+\]')
+_SRC_RE = re.compile(r'\bsources\b', re.IGNORECASE)
+
 # Router
 chat_router = APIRouter(prefix="", tags=["chat"])
 
@@ -58,12 +73,13 @@ class ChatRequest(BaseModel):
         return v.strip()
 
 
+@lru_cache(maxsize=8)
 def _load_prompt_template(filename: str) -> str:
-    """Load prompt template from file"""
+    """Load prompt template from file (read once per process, then cached)"""
     try:
         # Try local prompts first, then fallback to packages
-        local_path = os.path.join(os.path.dirname(__file__), '../shared/prompts', filename)
-        packages_path = os.path.join(os.path.dirname(__file__), '../../../packages/shared/prompts', filename)
+        local_path = os.path.join(_LOCAL_PROMPTS_DIR, filename)
+        packages_path = os.path.join(_PACKAGES_PROMPTS_DIR, filename)
         
         template_path = local_path if os.path.exists(local_path) else packages_path
         with open(template_path, 'r') as f:
@@ -77,16 +93,55 @@ def _load_prompt_template(filename: str) -> str:
         return f"Template {filename} not found"
 
 
-def _format_sse_event(event: str, data: Dict[str, Any]) -> str:
-    """Format Server-Sent Event"""
-    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+def _format_sse_event(event: str, data: Dict[str, Any]) -> bytes:
+    """Format Server-Sent Event as ready-to-send bytes"""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + _SSE_SUFFIX
+
+
+def _delta_event(token: str) -> bytes:
+    """Format a streamed token as a delta Server-Sent Event"""
+    return _DELTA_PREFIX + orjson.dumps({"token": token}) + _SSE_SUFFIX
 
 
 def _has_proper_citations(text: str) -> bool:
-    """Check if text has proper citations"""
-    has_brackets = '[' in text and ']' in text
-    has_sources_section = 'sources' in text.lower()
-    return has_brackets and has_sources_section
+    """Check if text has numbered citation markers and a sources section"""
+    return bool(_CITE_RE.search(text) and _SRC_RE.search(text))
+
+
+def _setup_conversation(db: Session, requested_id: Optional[str]) -> str:
+    """Reuse the requested conversation if it exists, else start one (blocking DB calls)"""
+    try:
+        if requested_id and conversation_exists(db, requested_id):
+            logger.info(f"Using existing conversation: {requested_id}")
+            return requested_id
+        conversation_id = start_conversation(db)
+        logger.info(f"Started new conversation: {conversation_id}")
+        return conversation_id
+    except Exception as e:
+        logger.error(f"Conversation setup failed: {e}")
+        # Create fresh database session and retry
+        db.rollback()
+        try:
+            conversation_id = start_conversation(db)
+            logger.info(f"Started new conversation after error recovery: {conversation_id}")
+            return conversation_id
+        except Exception as retry_e:
+            logger.error(f"Failed to recover conversation setup: {retry_e}")
+            raise Exception("Unable to setup conversation. Please try again.")
+
+
+def _persist_turn(db: Session, conversation_id: str, user_message: str, final_text: str) -> None:
+    """Save both messages of a turn and refresh the summary (blocking DB and LLM calls)"""
+    # Save messages
+    append_message(db, conversation_id, "user", user_message)
+    append_message(db, conversation_id, "assistant", final_text)
+    
+    # Update summary
+    recent_messages = get_recent_messages_raw(db, conversation_id, limit=8)
+    if len(recent_messages) > 2:  # Only summarize if we have enough history
+        new_summary = summarize_short(recent_messages)
+        set_summary(db, conversation_id, new_summary)
+        logger.debug(f"Updated summary: {new_summary}")
 
 
 async def _generate_chat_stream(
@@ -95,33 +150,17 @@ async def _generate_chat_stream(
 ):
     """Generate chat response stream"""
     try:
-        # Step 1: Setup conversation with error recovery
-        conversation_id = None
-        try:
-            if request.conversation_id and conversation_exists(db, request.conversation_id):
-                conversation_id = request.conversation_id
-                logger.info(f"Using existing conversation: {conversation_id}")
-            else:
-                conversation_id = start_conversation(db)
-                logger.info(f"Started new conversation: {conversation_id}")
-        except Exception as e:
-            logger.error(f"Conversation setup failed: {e}")
-            # Create fresh database session and retry
-            db.rollback()
-            try:
-                conversation_id = start_conversation(db)
-                logger.info(f"Started new conversation after error recovery: {conversation_id}")
-            except Exception as retry_e:
-                logger.error(f"Failed to recover conversation setup: {retry_e}")
-                raise Exception("Unable to setup conversation. Please try again.")
+        # Step 1: Setup conversation with error recovery. The blocking DB and LLM
+        # calls below run in worker threads so concurrent streams keep multiplexing
+        conversation_id = await anyio.to_thread.run_sync(_setup_conversation, db, request.conversation_id)
         
         # Step 2: Get conversation context
-        summary = get_summary(db, conversation_id) or "(none)"
+        summary = await anyio.to_thread.run_sync(get_summary_raw, db, conversation_id) or "(none)"
         logger.debug(f"Conversation summary: {summary[:100]}...")
         
         # Step 3: Retrieval pass - get relevant passages
         logger.info(f"Starting retrieval for query: {request.message[:50]}...")
-        passages = hybrid_search(request.message)
+        passages = await anyio.to_thread.run_sync(hybrid_search, request.message)
         formatted_passages, sources_list = format_passages(passages)
         
         logger.info(f"Retrieved {len(passages)} passages")
@@ -144,12 +183,13 @@ Passages:
             {"role": "user", "content": plan_prompt}
         ]
         
-        plan = complete(
+        plan = await anyio.to_thread.run_sync(partial(
+            complete,
             plan_messages,
             model=settings.LLM_MODEL,
             temperature=settings.LLM_TEMPERATURE,
             max_tokens=200
-        )
+        ))
         
         logger.info(f"Generated plan: {plan[:100]}...")
         
@@ -175,17 +215,19 @@ Now write the final answer using the required sections and inline citations."""}
         
         # Stream the response
         start_time = time.time()
-        final_text = ""
+        answer_parts: List[str] = []
         
         try:
-            for token in stream_chat(
+            async for token in astream_chat(
                 answer_messages,
                 model=settings.LLM_MODEL,
                 temperature=settings.LLM_TEMPERATURE,
                 max_tokens=settings.LLM_MAX_TOKENS
             ):
-                final_text += token
-                yield _format_sse_event("delta", {"token": token})
+                answer_parts.append(token)
+                yield _delta_event(token)
+            
+            final_text = "".join(answer_parts)
             
             # Record latency
             latency_ms = (time.time() - start_time) * 1000
@@ -209,34 +251,24 @@ Now write the final answer using the required sections and inline citations."""}
                     {"role": "user", "content": "Your first attempt lacked proper citations. Try again and include inline [1],[2],... markers with a Sources section."}
                 ]
                 
-                retry_text = ""
-                for token in stream_chat(
+                retry_parts: List[str] = []
+                async for token in astream_chat(
                     retry_messages,
                     model=settings.LLM_MODEL,
                     temperature=settings.LLM_TEMPERATURE,
                     max_tokens=settings.LLM_MAX_TOKENS
                 ):
-                    retry_text += token
-                    yield _format_sse_event("delta", {"token": token})
+                    retry_parts.append(token)
+                    yield _delta_event(token)
                 
-                final_text = retry_text
+                final_text = "".join(retry_parts)
                 logger.info("Retry completed with better citations")
         
         # Step 7: Persistence with transaction handling
         logger.info("Persisting conversation...")
         
         try:
-            # Save messages
-            append_message(db, conversation_id, "user", request.message)
-            append_message(db, conversation_id, "assistant", final_text)
-            
-            # Update summary
-            recent_messages = get_recent_messages(db, conversation_id, limit=8)
-            if len(recent_messages) > 2:  # Only summarize if we have enough history
-                new_summary = summarize_short(recent_messages)
-                set_summary(db, conversation_id, new_summary)
-                logger.debug(f"Updated summary: {new_summary}")
-                
+            await anyio.to_thread.run_sync(_persist_turn, db, conversation_id, request.message, final_text)
         except Exception as persist_e:
             logger.error(f"Failed to persist conversation: {persist_e}")
             db.rollback()
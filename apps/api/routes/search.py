@@ -3,6 +3,7 @@
 import time
 import logging
 from typing import List, Dict, Any
+import anyio
 from fastapi import APIRouter, Query, HTTPException
 from pydantic import BaseModel
 from prometheus_client import Histogram, Counter
@@ -69,18 +70,23 @@ async def search_articles(
     start_time = time.time()
     
     try:
-        # Perform hybrid search
-        results = hybrid_search(q)
+        # Perform hybrid search on a worker thread so the event loop keeps serving requests
+        results = await anyio.to_thread.run_sync(hybrid_search, q)
         
         # Convert to response format
         search_results = []
         for result in results:
+            # Cached results carry published_at as an ISO string already
+            published_at = result.get("published_at")
+            if hasattr(published_at, "isoformat"):
+                published_at = published_at.isoformat()
+            
             search_results.append(SearchResult(
                 chunk_id=result["chunk_id"],
                 article_id=result["article_id"],
                 title=result.get("title", ""),
                 url=result.get("url", ""),
-                published_at=result.get("published_at").isoformat() if result.get("published_at") else None,
+                published_at=published_at or None,
                 source_domain=result.get("source_domain", ""),
                 content=result["content"],
                 score=result.get("score", 0.0),
@@ -103,10 +109,10 @@ async def search_articles(
 
 
 # Export metrics counters for use by reranker
-def increment_cache_hits():
-    """Increment cache hits counter (called by reranker)"""
-    reranker_cache_hits_counter.inc()
+def increment_cache_hits(count: int = 1):
+    """Increment cache hits counter by count (called by reranker)"""
+    reranker_cache_hits_counter.inc(count)
 
-def increment_cache_misses():
-    """Increment cache misses counter (called by reranker)"""
-    reranker_cache_misses_counter.inc()
\ No newline at end of file
+def increment_cache_misses(count: int = 1):
+    """Increment cache misses counter by count (called by reranker)"""
+    reranker_cache_misses_counter.inc(count)
\ No newline at end of file
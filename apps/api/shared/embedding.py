@@ -1,21 +1,98 @@
 """Simple embedding module for API"""
+import hashlib
 import numpy as np
 from typing import List
+from shared.embedding_cache import EmbeddingCache
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None  # Fall back to the vectorized NumPy generator
+
+# 3072 dimensions for OpenAI compatibility
+EMBEDDING_DIM = 3072
+
+# Repeat queries skip embedding entirely
+_embedding_cache = EmbeddingCache("api")
+
+# SplitMix64 constants for the counter-based generator
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX_MULT_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_MULT_2 = np.uint64(0x94D049BB133111EB)
 
 def embed_texts(texts: List[str]) -> np.ndarray:
     """
     Simple fallback embedding function that returns deterministic vectors
     This is a placeholder until the packages/ directory is properly loaded
     """
-    # Create deterministic embeddings based on text hash
-    embeddings = []
-    for text in texts:
-        # Create a simple hash-based embedding (3072 dimensions for OpenAI compatibility)
-        text_hash = hash(text)
-        # Use the hash to create a deterministic vector
-        np.random.seed(text_hash % 2**31)  # Ensure positive seed
-        embedding = np.random.normal(0, 1, 3072)
-        embedding = embedding / np.linalg.norm(embedding)  # Normalize
-        embeddings.append(embedding)
-    
-    return np.array(embeddings)
\ No newline at end of file
+    return _embedding_cache.get_or_compute(texts, _embed_deterministic)
+
+
+def _embed_deterministic(texts: List[str]) -> np.ndarray:
+    """Generate deterministic unit vectors seeded from each text"""
+    # Derive a stable 64-bit seed per text (unlike hash(), not randomized per process)
+    seeds = np.frombuffer(
+        b''.join(hashlib.blake2b(text.encode(), digest_size=8).digest() for text in texts),
+        dtype=np.uint64
+    )
+
+    embeddings = np.empty((len(texts), EMBEDDING_DIM), dtype=np.float32)
+    _fill_normalized(seeds, embeddings)
+    return embeddings
+
+
+def _fill_normalized_numpy(seeds: np.ndarray, out: np.ndarray) -> None:
+    """
+    Fill each row of out with unit-normalized Gaussian noise derived from its seed.
+
+    Element k of a row is SplitMix64(seed + (k + 1) * gamma); consecutive pairs
+    become two normals via Box-Muller. Being counter-based, every element can be
+    generated independently, so rows vectorize here and parallelize under Numba.
+    """
+    counters = np.arange(1, out.shape[1] + 1, dtype=np.uint64) * _GOLDEN_GAMMA
+    z = seeds[:, None] + counters[None, :]
+    z = (z ^ (z >> np.uint64(30))) * _MIX_MULT_1
+    z = (z ^ (z >> np.uint64(27))) * _MIX_MULT_2
+    z ^= z >> np.uint64(31)
+
+    # Top 53 bits to a uniform in (0, 1), then Box-Muller on consecutive pairs
+    uniforms = ((z >> np.uint64(11)).astype(np.float64) + 0.5) * (1.0 / 2**53)
+    radius = np.sqrt(-2.0 * np.log(uniforms[:, 0::2]))
+    angle = 2.0 * np.pi * uniforms[:, 1::2]
+    rows = np.empty(out.shape, dtype=np.float64)
+    rows[:, 0::2] = radius * np.cos(angle)
+    rows[:, 1::2] = radius * np.sin(angle)
+
+    # Normalize in float64 and round to float32 once, exactly as the Numba kernel does
+    out[:] = rows * (1.0 / np.sqrt((rows * rows).sum(axis=1)))[:, None]
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _fill_normalized(seeds, out):
+        """Numba version of _fill_normalized_numpy, one row per parallel iteration"""
+        dim = out.shape[1]
+        for i in prange(seeds.shape[0]):
+            row = np.empty(dim, dtype=np.float64)
+            for j in range(0, dim, 2):
+                z1 = seeds[i] + np.uint64(j + 1) * _GOLDEN_GAMMA
+                z1 = (z1 ^ (z1 >> np.uint64(30))) * _MIX_MULT_1
+                z1 = (z1 ^ (z1 >> np.uint64(27))) * _MIX_MULT_2
+                z1 ^= z1 >> np.uint64(31)
+                z2 = seeds[i] + np.uint64(j + 2) * _GOLDEN_GAMMA
+                z2 = (z2 ^ (z2 >> np.uint64(30))) * _MIX_MULT_1
+                z2 = (z2 ^ (z2 >> np.uint64(27))) * _MIX_MULT_2
+                z2 ^= z2 >> np.uint64(31)
+
+                u1 = (np.float64(z1 >> np.uint64(11)) + 0.5) * (1.0 / 2**53)
+                u2 = (np.float64(z2 >> np.uint64(11)) + 0.5) * (1.0 / 2**53)
+                radius = np.sqrt(-2.0 * np.log(u1))
+                row[j] = radius * np.cos(2.0 * np.pi * u2)
+                row[j + 1] = radius * np.sin(2.0 * np.pi * u2)
+
+            # Same float64 norm expression as the NumPy path, then one rounding to float32
+            inv_norm = 1.0 / np.sqrt((row * row).sum())
+            for j in range(dim):
+                out[i, j] = row[j] * inv_norm
+else:
+    _fill_normalized = _fill_normalized_numpy
@@ -0,0 +1,84 @@
+"""In-process LRU cache for text embeddings"""
+import hashlib
+import os
+import sys
+from collections import OrderedDict
+from typing import Callable, List, Optional
+import numpy as np
+from core.config import settings
+
+# Project root, for the shared cache helper in packages/
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../../'))
+from packages.shared.lru import TTLCache
+
+try:
+    from prometheus_client import Counter
+    embedding_cache_hits_counter = Counter(
+        'embedding_cache_hits_total',
+        'Total number of embedding cache hits',
+        ['cache']
+    )
+    embedding_cache_misses_counter = Counter(
+        'embedding_cache_misses_total',
+        'Total number of embedding cache misses',
+        ['cache']
+    )
+except ImportError:
+    embedding_cache_hits_counter = None  # Metrics not available
+    embedding_cache_misses_counter = None
+
+
+class EmbeddingCache:
+    """Thread-safe LRU cache of embedding vectors with a TTL, keyed by text digest"""
+
+    def __init__(self, name: str, maxsize: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.name = name
+        self._entries = TTLCache(
+            maxsize if maxsize is not None else settings.EMBEDDING_CACHE_SIZE,
+            ttl_seconds if ttl_seconds is not None else settings.EMBEDDING_CACHE_TTL_SECONDS
+        )
+        # Bumping CACHE_NAMESPACE (e.g. on a model change) invalidates every key
+        self._key_prefix = f"{settings.CACHE_NAMESPACE}:{name}:".encode()
+
+    def _key(self, text: str) -> bytes:
+        """Digest the namespaced text into a compact cache key"""
+        return hashlib.blake2b(self._key_prefix + text.encode(), digest_size=16).digest()
+
+    def get_or_compute(self, texts: List[str], compute: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Return embeddings for texts, computing only the ones not already cached.
+
+        Args:
+            texts: List of text strings to embed
+            compute: Function embedding a list of texts into a 2D array
+
+        Returns:
+            Array of embeddings in the same order as texts
+        """
+        if not texts:
+            return np.asarray(compute(texts))
+
+        keys = [self._key(text) for text in texts]
+        vectors: List[Optional[np.ndarray]] = self._entries.get_many(keys)
+        # Positions of each missing text, so duplicates within a batch are computed once
+        misses: "OrderedDict[bytes, List[int]]" = OrderedDict()
+        for i, key in enumerate(keys):
+            if vectors[i] is None:
+                misses.setdefault(key, []).append(i)
+
+        if misses:
+            computed = np.asarray(compute([texts[positions[0]] for positions in misses.values()]))
+            for (key, positions), vector in zip(misses.items(), computed):
+                for i in positions:
+                    vectors[i] = vector
+            self._entries.put_many(zip(misses.keys(), computed))
+
+        if embedding_cache_hits_counter is not None:
+            embedding_cache_hits_counter.labels(self.name).inc(len(texts) - len(misses))
+            embedding_cache_misses_counter.labels(self.name).inc(len(misses))
+
+        return np.vstack(vectors)
+
+    def clear(self):
+        """Drop every cached embedding"""
+        self._entries.clear()
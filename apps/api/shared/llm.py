@@ -1,15 +1,33 @@
 """Shared LLM client with streaming support and graceful fallback"""
 
 import os
+import asyncio
 import logging
 import time
-from typing import Iterator, List, Dict, Any
+from typing import AsyncIterator, Iterator, List, Dict, Any
 import hashlib
 
 logger = logging.getLogger(__name__)
+
+# Sentinel marking the end of a token stream handed across threads
+_STREAM_END = object()
 # Force reload to fix str callable error
 
 
+def configure_llm(session=None) -> None:
+    """
+    Startup hook matching packages.shared.llm; this fallback keeps no pooled connections.
+
+    Args:
+        session: Ignored; accepted for signature compatibility
+    """
+    logger.info("Using fallback LLM module without shared connection pools")
+
+
+async def aclose_llm() -> None:
+    """Shutdown hook matching packages.shared.llm; nothing to close in the fallback"""
+
+
 def stream_chat(messages: List[Dict[str, str]], *, model: str, temperature: float, max_tokens: int) -> Iterator[str]:
     """
     Stream chat completion tokens.
@@ -36,6 +54,45 @@ def stream_chat(messages: List[Dict[str, str]], *, model: str, temperature: floa
         yield from _fake_stream(messages)
 
 
+async def astream_chat(messages: List[Dict[str, str]], *, model: str, temperature: float, max_tokens: int) -> AsyncIterator[str]:
+    """
+    Stream chat completion tokens without blocking the event loop.
+    
+    The blocking stream_chat generator runs on a worker thread and hands each
+    token back to the loop, so other requests are served between tokens.
+    
+    Args:
+        messages: List of message dicts with 'role' and 'content' keys
+        model: Model name (e.g., 'gpt-4o-mini')
+        temperature: Temperature parameter
+        max_tokens: Maximum tokens to generate
+        
+    Yields:
+        str: Individual tokens from the response
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    def produce():
+        try:
+            for token in stream_chat(messages, model=model, temperature=temperature, max_tokens=max_tokens):
+                loop.call_soon_threadsafe(queue.put_nowait, (token, None))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (None, e))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, (_STREAM_END, None))
+    
+    producer = loop.run_in_executor(None, produce)
+    while True:
+        token, error = await queue.get()
+        if error is not None:
+            raise error
+        if token is _STREAM_END:
+            break
+        yield token
+    await producer
+
+
 def complete(messages: List[Dict[str, str]], *, model: str, temperature: float, max_tokens: int) -> str:
     """
     Complete chat completion (non-streaming).
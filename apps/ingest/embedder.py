@@ -1,6 +1,7 @@
 """Embedding and chunking functionality"""
 
 import os
+import re
 import sys
 import logging
 import hashlib
@@ -10,12 +11,48 @@ import psycopg
 import tiktoken
 from sqlalchemy.sql import text
 
+try:
+    from pgvector import HalfVector
+    from pgvector.psycopg import register_vector
+except ImportError:
+    HalfVector = None
+    register_vector = None  # Fall back to sending embeddings as text arrays
+
 # Add the API directory to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '../api'))
 from core.config import settings
+from shared.embedding_cache import EmbeddingCache
 
 logger = logging.getLogger(__name__)
 
+# SQLAlchemy URL converted to psycopg format once at import
+DB_URL = settings.DATABASE_URL.replace("postgresql+psycopg://", "postgresql://")
+
+# Re-ingested and repeated chunks reuse their embeddings (and are not re-billed)
+_embedding_cache = EmbeddingCache("ingest")
+_openai_embedding_cache = EmbeddingCache("ingest-openai")
+
+# OpenAI embedding model (matches retrieval query embeddings) and max inputs per request
+OPENAI_EMBED_MODEL = "text-embedding-3-large"
+OPENAI_EMBED_BATCH_SIZE = 2048
+
+# Words are maximal runs of non-whitespace, matching str.split()
+_WORD_PATTERN = re.compile(r'\S+')
+
+# Chunk insert with tsvector generated for full-text search; the binary variant
+# sends embeddings as binary pgvector values instead of text float arrays
+_INSERT_CHUNK_SQL = """
+    INSERT INTO article_chunks (article_id, position, content, embedding, tsv)
+    VALUES (%s, %s, %s, %s, to_tsvector('simple', %s))
+"""
+_INSERT_CHUNK_BINARY_SQL = """
+    INSERT INTO article_chunks (article_id, position, content, embedding, tsv)
+    VALUES (%s, %s, %s, %b, to_tsvector('simple', %s))
+"""
+
+# Articles with more chunks than this are loaded with COPY instead of executemany
+COPY_MIN_CHUNKS = 100
+
 
 def chunk_text(text: str, chunk_size: int = 800, overlap: int = 120) -> List[str]:
     """
@@ -32,20 +69,20 @@ def chunk_text(text: str, chunk_size: int = 800, overlap: int = 120) -> List[str
     if not text.strip():
         return []
     
-    words = text.split()
-    if len(words) <= chunk_size:
+    # Word boundaries as character offsets, so chunks are slices of the original text
+    offsets = [match.span() for match in _WORD_PATTERN.finditer(text)]
+    if len(offsets) <= chunk_size:
         return [text]
     
     chunks = []
     start = 0
     
-    while start < len(words):
-        end = min(start + chunk_size, len(words))
-        chunk_words = words[start:end]
-        chunks.append(' '.join(chunk_words))
+    while start < len(offsets):
+        end = min(start + chunk_size, len(offsets))
+        chunks.append(text[offsets[start][0]:offsets[end - 1][1]])
         
         # If we've reached the end, break
-        if end >= len(words):
+        if end >= len(offsets):
             break
             
         # Move start position, accounting for overlap
@@ -67,23 +104,49 @@ def embed_texts(texts: List[str]) -> List[List[float]]:
     openai_api_key = os.getenv('OPENAI_API_KEY')
     
     if openai_api_key:
-        # TODO: Implement OpenAI embeddings when API key is available
-        logger.info("OpenAI API key found - using deterministic fallback for now")
+        try:
+            return _openai_embedding_cache.get_or_compute(
+                texts, lambda batch: _embed_with_openai(batch, openai_api_key)
+            ).tolist()
+        except Exception as e:
+            logger.warning(f"OpenAI embedding failed: {e}, falling back to deterministic vectors")
     
     # Deterministic random vectors for testing/fallback
+    return _embedding_cache.get_or_compute(texts, _embed_deterministic).tolist()
+
+
+def _embed_with_openai(texts: List[str], api_key: str) -> np.ndarray:
+    """Embed texts with the OpenAI API, sending up to OPENAI_EMBED_BATCH_SIZE inputs per request"""
+    import openai
+    client = openai.OpenAI(api_key=api_key)
+    
+    embeddings = []
+    for start in range(0, len(texts), OPENAI_EMBED_BATCH_SIZE):
+        response = client.embeddings.create(
+            input=texts[start:start + OPENAI_EMBED_BATCH_SIZE],
+            model=OPENAI_EMBED_MODEL
+        )
+        embeddings.extend(item.embedding for item in response.data)
+    
+    logger.info(f"Embedded {len(texts)} texts using OpenAI")
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def _embed_deterministic(texts: List[str]) -> np.ndarray:
+    """Generate deterministic 1536-dimensional unit vectors seeded from each text"""
     embeddings = []
     for text in texts:
-        # Use SHA256 hash of text as seed for reproducible results
-        seed = int(hashlib.sha256(text.encode()).hexdigest()[:8], 16)
-        np.random.seed(seed % (2**32))
+        # Seed from the first 4 bytes of the SHA256 digest for reproducible results
+        seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:4], 'big')
+        np.random.seed(seed)
         
         # Generate 1536-dimensional vector (compatible with ivfflat index limit)
         vector = np.random.normal(0, 1, 1536)
         # Normalize to unit vector
         vector = vector / np.linalg.norm(vector)
-        embeddings.append(vector.tolist())
+        embeddings.append(vector)
     
-    return embeddings
+    return np.array(embeddings).reshape(len(texts), 1536)
 
 
 def embed_article(conn: psycopg.Connection, article_id: int, full_text: str) -> bool:
@@ -110,14 +173,21 @@ def embed_article(conn: psycopg.Connection, article_id: int, full_text: str) ->
         # Generate embeddings
         embeddings = embed_texts(chunks)
         
-        # Insert chunks with embeddings
+        # Insert chunks with embeddings in one batch
         with conn.cursor() as cur:
-            for position, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                # Generate tsvector for full-text search
-                cur.execute("""
-                    INSERT INTO article_chunks (article_id, position, content, embedding, tsv)
-                    VALUES (%s, %s, %s, %s, to_tsvector('simple', %s))
-                """, (article_id, position, chunk, embedding, chunk))
+            if len(chunks) > COPY_MIN_CHUNKS:
+                _copy_chunks(cur, article_id, chunks, embeddings)
+            elif _ensure_vector_adapter(conn):
+                # Binary halfvec parameters; executemany pipelines one prepared statement
+                cur.executemany(_INSERT_CHUNK_BINARY_SQL, [
+                    (article_id, position, chunk, HalfVector(embedding), chunk)
+                    for position, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+                ])
+            else:
+                cur.executemany(_INSERT_CHUNK_SQL, [
+                    (article_id, position, chunk, embedding, chunk)
+                    for position, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+                ])
         
         conn.commit()
         logger.info(f"Successfully embedded article {article_id} with {len(chunks)} chunks")
@@ -129,12 +199,34 @@ def embed_article(conn: psycopg.Connection, article_id: int, full_text: str) ->
         return False
 
 
+def _ensure_vector_adapter(conn: psycopg.Connection) -> bool:
+    """Register pgvector's binary adapter on conn once; False if pgvector is not installed"""
+    if register_vector is None:
+        return False
+    if conn.adapters.types.get("vector") is None:
+        register_vector(conn)
+    return True
+
+
+def _copy_chunks(cur: psycopg.Cursor, article_id: int, chunks: List[str], embeddings: List[List[float]]):
+    """Bulk load chunk rows with COPY, then fill their tsvectors in one UPDATE"""
+    with cur.copy("COPY article_chunks (article_id, position, content, embedding) FROM STDIN") as copy:
+        for position, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+            # pgvector text format: [x1,x2,...]; float16 values print at halfvec precision
+            half = np.asarray(embedding, dtype=np.float16)
+            copy.write_row((article_id, position, chunk, f"[{','.join(map(str, half))}]"))
+    
+    cur.execute(
+        "UPDATE article_chunks SET tsv = to_tsvector('simple', content) WHERE article_id = %s AND tsv IS NULL",
+        (article_id,)
+    )
+
+
 def main():
     """CLI entrypoint for embedding articles"""
     # Connect to database
     try:
-        db_url = settings.DATABASE_URL.replace("postgresql+psycopg://", "postgresql://")
-        conn = psycopg.connect(db_url)
+        conn = psycopg.connect(DB_URL)
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
         sys.exit(1)
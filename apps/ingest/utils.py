@@ -1,11 +1,13 @@
 """Utility functions for ingestion pipeline"""
 
 import hashlib
+from functools import lru_cache
 from urllib.parse import urlparse
 
 
+@lru_cache(maxsize=4096)
 def sha256_bytes(url: str) -> bytes:
-    """Generate SHA256 hash of URL as bytes"""
+    """Generate SHA256 hash of URL as bytes (memoized for URLs seen repeatedly in a batch)"""
     return hashlib.sha256(url.encode('utf-8')).digest()
 
 
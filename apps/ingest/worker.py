@@ -3,14 +3,24 @@
 import os
 import sys
 import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Iterator
+import numpy as np
 import psycopg
 from simhash import Simhash
 import trafilatura
-from playwright.sync_api import sync_playwright
+from playwright.sync_api import Browser, sync_playwright
 from .utils import sha256_bytes, get_domain
 
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError:
+    ConnectionPool = None  # Fall back to a connection per URL
+
 # Add the API directory to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '../api'))
 from core.config import settings
@@ -19,17 +29,63 @@ from core.config import settings
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# SQLAlchemy URL converted to psycopg format once at import
+DB_URL = settings.DATABASE_URL.replace("postgresql+psycopg://", "postgresql://")
+
+# Number of 16-bit bands indexed per 64-bit simhash (see simhash_bands table)
+SIMHASH_BANDS = 4
+
+# Resource types skipped when loading pages; only the HTML is needed
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+# Concurrent ingest workers (each runs its own browser) and fetches allowed per domain
+INGEST_MAX_WORKERS = 8
+MAX_FETCHES_PER_DOMAIN = 2
+
+_domain_semaphores: Dict[str, threading.Semaphore] = {}
+_domain_semaphores_lock = threading.Lock()
+
+
+def _block_heavy_resources(route):
+    """Abort requests for resources that carry no article text"""
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        route.abort()
+    else:
+        route.continue_()
+
+
+def _fetch_with_browser(browser: Browser, url: str) -> str:
+    """Load url in a fresh browser context and return the page HTML"""
+    context = browser.new_context()
+    try:
+        page = context.new_page()
+        page.route("**/*", _block_heavy_resources)
+        page.goto(url, timeout=30000)  # 30 second timeout
+        return page.content()
+    finally:
+        context.close()
+
 
-def fetch_html(url: str) -> str:
-    """Fetch HTML content using Playwright with Firefox headless"""
+def fetch_html(url: str, browser: Optional[Browser] = None) -> str:
+    """
+    Fetch HTML content using Playwright with Firefox headless.
+    
+    Args:
+        url: URL to fetch
+        browser: Already launched browser to reuse; a new one is launched if omitted
+        
+    Returns:
+        Page HTML
+    """
     try:
+        if browser is not None:
+            return _fetch_with_browser(browser, url)
         with sync_playwright() as p:
             browser = p.firefox.launch(headless=True)
-            page = browser.new_page()
-            page.goto(url, timeout=30000)  # 30 second timeout
-            html = page.content()
-            browser.close()
-            return html
+            try:
+                return _fetch_with_browser(browser, url)
+            finally:
+                browser.close()
     except Exception as e:
         if "Playwright" in str(e):
             raise RuntimeError(
@@ -54,28 +110,56 @@ def compute_simhash(text_or_title: str) -> int:
     return raw_value if raw_value < 2**63 else raw_value - 2**64
 
 
+def simhash_bands(simhash: int) -> List[int]:
+    """Split a 64-bit simhash into four 16-bit bands, as signed smallint values"""
+    unsigned = simhash & 0xFFFFFFFFFFFFFFFF
+    bands = []
+    for band_no in range(SIMHASH_BANDS):
+        band = (unsigned >> (16 * band_no)) & 0xFFFF
+        bands.append(band - 0x10000 if band >= 0x8000 else band)
+    return bands
+
+
 def near_duplicate(conn: psycopg.Connection, simhash: int, days_back: int = 14) -> bool:
     """Check if article is near-duplicate based on simhash within last N days"""
     if simhash == 0:
         return False
     
     cutoff_date = datetime.now() - timedelta(days=days_back)
+    bands = simhash_bands(simhash)
     
     with conn.cursor() as cur:
+        # Only articles sharing a band can be within Hamming distance 3
         cur.execute("""
-            SELECT simhash FROM articles 
-            WHERE created_at >= %s AND simhash IS NOT NULL
-        """, (cutoff_date,))
-        
-        existing_hashes = [row[0] for row in cur.fetchall()]
+            SELECT a.simhash FROM articles a
+            WHERE a.id IN (
+                SELECT article_id FROM simhash_bands
+                WHERE (band_no = 0 AND band_val = %s)
+                   OR (band_no = 1 AND band_val = %s)
+                   OR (band_no = 2 AND band_val = %s)
+                   OR (band_no = 3 AND band_val = %s)
+            )
+            AND a.created_at >= %s AND a.simhash IS NOT NULL
+        """, (*bands, cutoff_date))
         
-        # Check Hamming distance <= 3 for near duplicates
-        for existing_hash in existing_hashes:
-            hamming_distance = bin(simhash ^ existing_hash).count('1')
-            if hamming_distance <= 3:
-                return True
+        rows = cur.fetchall()
     
-    return False
+    if not rows:
+        return False
+    
+    # Check Hamming distance <= 3 for near duplicates across all candidates at once;
+    # viewing the signed bigints as uint64 keeps the XOR on the raw 64-bit patterns
+    existing_hashes = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)).view(np.uint64)
+    distances = _popcount(existing_hashes ^ np.int64(simhash).view(np.uint64))
+    return bool((distances <= 3).any())
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    """Count set bits in each uint64 value"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    # NumPy < 2.0: unpack the bytes of each value and sum the bits
+    return np.unpackbits(values.view(np.uint8)).reshape(-1, 64).sum(axis=1)
 
 
 def upsert_article(
@@ -110,6 +194,11 @@ def upsert_article(
             result = cur.fetchone()
             if result:
                 article_id = result[0]
+                if simhash_value != 0:
+                    cur.executemany(
+                        "INSERT INTO simhash_bands (band_no, band_val, article_id) VALUES (%s, %s, %s)",
+                        [(band_no, band_val, article_id) for band_no, band_val in enumerate(simhash_bands(simhash_value))]
+                    )
                 conn.commit()
                 logger.info(f"Inserted article {article_id}: {title or url}")
                 return article_id
@@ -123,18 +212,46 @@ def upsert_article(
         return None
 
 
-def ingest_url(url: str) -> Dict[str, Any]:
-    """Ingest a single URL and return stats"""
+@contextmanager
+def _db_connection(pool: Optional["ConnectionPool"] = None) -> Iterator[psycopg.Connection]:
+    """Borrow a connection from pool, or open a dedicated one if no pool is given"""
+    if pool is not None:
+        with pool.connection() as conn:
+            yield conn
+        return
+    
+    conn = psycopg.connect(DB_URL)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def _domain_semaphore(domain: str) -> threading.Semaphore:
+    """Get the semaphore limiting concurrent fetches to domain"""
+    with _domain_semaphores_lock:
+        semaphore = _domain_semaphores.get(domain)
+        if semaphore is None:
+            semaphore = threading.Semaphore(MAX_FETCHES_PER_DOMAIN)
+            _domain_semaphores[domain] = semaphore
+        return semaphore
+
+
+def ingest_url(
+    url: str,
+    browser: Optional[Browser] = None,
+    pool: Optional["ConnectionPool"] = None
+) -> Dict[str, Any]:
+    """Ingest a single URL and return stats, reusing browser and pool when given"""
     stats = {"url": url, "success": False, "article_id": None, "error": None}
     
     try:
-        # Convert SQLAlchemy URL to psycopg format
-        db_url = settings.DATABASE_URL.replace("postgresql+psycopg://", "postgresql://")
-        conn = psycopg.connect(db_url)
+        source_domain = get_domain(url)
         
         # Fetch and extract content
         logger.info(f"Fetching URL: {url}")
-        html = fetch_html(url)
+        with _domain_semaphore(source_domain):
+            html = fetch_html(url, browser)
         
         logger.info(f"Extracting text from {url}")
         body = extract_text(html)
@@ -146,20 +263,18 @@ def ingest_url(url: str) -> Dict[str, Any]:
         # Extract basic metadata (title from first line or URL)
         lines = body.split('\n')
         title = lines[0].strip()[:200] if lines and lines[0].strip() else None
-        source_domain = get_domain(url)
         
         # Upsert article
-        article_id = upsert_article(
-            conn, url, title, body, None, source_domain
-        )
+        with _db_connection(pool) as conn:
+            article_id = upsert_article(
+                conn, url, title, body, None, source_domain
+            )
         
         if article_id:
             stats["article_id"] = article_id
             stats["success"] = True
             # TODO: Enqueue for embedding processing
         
-        conn.close()
-        
     except Exception as e:
         stats["error"] = str(e)
         logger.error(f"Failed to ingest {url}: {e}")
@@ -167,6 +282,24 @@ def ingest_url(url: str) -> Dict[str, Any]:
     return stats
 
 
+def _ingest_from_queue(url_queue: "queue.SimpleQueue[str]", pool: Optional["ConnectionPool"]) -> List[Dict[str, Any]]:
+    """Worker loop: ingest queued URLs with one browser per thread until the queue is empty"""
+    results = []
+    # Playwright's sync API is bound to the thread that started it, so each worker owns a browser
+    with sync_playwright() as p:
+        browser = p.firefox.launch(headless=True)
+        try:
+            while True:
+                try:
+                    url = url_queue.get_nowait()
+                except queue.Empty:
+                    break
+                results.append(ingest_url(url, browser, pool))
+        finally:
+            browser.close()
+    return results
+
+
 def main():
     """CLI entrypoint for ingestion worker"""
     # Create seeds.txt if it doesn't exist
@@ -195,17 +328,40 @@ def main():
     
     logger.info(f"Starting ingestion of {len(urls)} URLs")
     
-    # Process each URL
+    # Process URLs concurrently, sharing one connection pool across workers
     success_count = 0
     error_count = 0
     
+    url_queue: "queue.SimpleQueue[str]" = queue.SimpleQueue()
     for url in urls:
-        stats = ingest_url(url)
-        if stats["success"]:
-            success_count += 1
-        else:
-            error_count += 1
-            logger.error(f"Failed {url}: {stats['error']}")
+        url_queue.put(url)
+    num_workers = min(INGEST_MAX_WORKERS, len(urls))
+    
+    pool = None
+    if ConnectionPool is not None:
+        pool = ConnectionPool(DB_URL, min_size=2, max_size=max(2, num_workers), open=True)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="ingest") as executor:
+            futures = [executor.submit(_ingest_from_queue, url_queue, pool) for _ in range(num_workers)]
+            for future in futures:
+                try:
+                    worker_results = future.result()
+                except Exception as e:
+                    logger.error(f"Ingest worker failed: {e}. Run: playwright install --with-deps")
+                    continue
+                for stats in worker_results:
+                    if stats["success"]:
+                        success_count += 1
+                    else:
+                        error_count += 1
+                        logger.error(f"Failed {stats['url']}: {stats['error']}")
+    finally:
+        if pool is not None:
+            pool.close()
+    
+    # URLs left unprocessed by failed workers count as errors
+    error_count += len(urls) - success_count - error_count
     
     # Print final stats
     logger.info(f"Ingestion complete. Success: {success_count}, Errors: {error_count}")
@@ -3,15 +3,94 @@
 Standalone demonstration of the MMR algorithm implementation
 """
 
+import math
+from dataclasses import dataclass, field
 import numpy as np
 from typing import List, Dict, Any
 
-def mmr(candidates: List[Dict[str, Any]], query_vec: np.ndarray, lambda_: float, k: int) -> List[Dict[str, Any]]:
+try:
+    from numba import njit
+except ImportError:
+    njit = None  # Fall back to the NumPy selection loop
+
+try:
+    import torch
+except ImportError:
+    torch = None  # CPU-only selection
+
+# Precompute the full candidate similarity matrix only while it stays this small
+SIM_MATRIX_MAX_BYTES = 8_000_000
+
+# Candidate pools at least this large are scored on the GPU when CUDA is available,
+# keeping a pairwise fp16 similarity matrix on the device up to the byte limit
+GPU_MIN_CANDIDATES = 256
+GPU_SIM_MATRIX_MAX_BYTES = 256_000_000
+
+@dataclass
+class CandidateBatch:
+    """Struct-of-arrays view of MMR candidates, one row per candidate"""
+    vecs: np.ndarray  # (n, d) float32 unit vectors
+    scores: np.ndarray  # (n,) first-stage relevance scores
+    ids: np.ndarray  # (n,) int64 candidate ids
+    meta: List[Dict[str, Any]] = field(default_factory=list)  # original candidate dicts
+    
+    @classmethod
+    def from_dicts(cls, candidates: List[Dict[str, Any]], id_key: str = 'id') -> "CandidateBatch":
+        """Pack candidate dicts with 'vec', 'score' and id fields into contiguous arrays"""
+        return cls(
+            vecs=np.ascontiguousarray(np.stack([np.asarray(c['vec'], dtype=np.float32) for c in candidates])),
+            scores=np.fromiter((c['score'] for c in candidates), dtype=np.float32, count=len(candidates)),
+            ids=np.fromiter((c.get(id_key, i) for i, c in enumerate(candidates)), dtype=np.int64, count=len(candidates)),
+            meta=candidates
+        )
+
+
+def mmr(batch: CandidateBatch, query_vec: np.ndarray, lambda_: float, k: int) -> np.ndarray:
     """
     Apply Maximal Marginal Relevance (MMR) to select diverse candidates.
     
     Args:
-        candidates: List of candidate documents with 'vec' and 'score' fields
+        batch: Candidates with unit-length vectors and scores
+        query_vec: Query vector as numpy array
+        lambda_: Trade-off parameter (0=diversity only, 1=relevance only)
+        k: Number of candidates to select
+        
+    Returns:
+        Row indices into batch in selection order (k or fewer if candidates < k)
+    """
+    n = len(batch.scores)
+    if n <= k:
+        return np.arange(n, dtype=np.int64)
+    
+    # Order by score so the first pick and argmax ties match a stable sort
+    order = np.argsort(-batch.scores, kind='stable')
+    V = batch.vecs[order]
+    if __debug__:
+        norms = np.linalg.norm(V, axis=1)
+        assert np.all((np.abs(norms - 1.0) < 1e-3) | (norms == 0.0)), "candidate vectors must be unit length"
+    
+    query_vec = _normalize_vector(np.asarray(query_vec, dtype=np.float32))
+    if torch is not None and n >= GPU_MIN_CANDIDATES and torch.cuda.is_available():
+        return order[_mmr_select_torch(V, query_vec, float(lambda_), k)]
+    
+    # Relevance term: cosine similarity of every candidate to the query
+    rel = V @ query_vec
+    
+    # Small pools get all pairwise similarities from one matrix product; an
+    # empty matrix tells the selection loop to compute similarities per pick
+    n_bytes = n * n * V.itemsize
+    S = V @ V.T if n_bytes < SIM_MATRIX_MAX_BYTES else np.empty((0, 0), dtype=np.float32)
+    
+    # First pick is the top-scored document, then k-1 MMR picks
+    return order[_mmr_select(V, rel.astype(np.float32, copy=False), np.float32(lambda_), k, S)]
+
+
+def mmr_dicts(candidates: List[Dict[str, Any]], query_vec: np.ndarray, lambda_: float, k: int) -> List[Dict[str, Any]]:
+    """
+    Dict-based wrapper around mmr.
+    
+    Args:
+        candidates: List of candidate documents with unit-length 'vec' and 'score' fields
         query_vec: Query vector as numpy array
         lambda_: Trade-off parameter (0=diversity only, 1=relevance only)
         k: Number of candidates to select
@@ -25,62 +104,140 @@ def mmr(candidates: List[Dict[str, Any]], query_vec: np.ndarray, lambda_: float,
     if len(candidates) <= k:
         return candidates
     
-    # Normalize query vector
-    query_vec = _normalize_vector(query_vec)
+    batch = CandidateBatch.from_dicts(candidates)
+    return [candidates[i] for i in mmr(batch, query_vec, lambda_, k)]
+
+
+def _mmr_select_numpy(V: np.ndarray, rel: np.ndarray, lam: float, k: int, S: np.ndarray) -> np.ndarray:
+    """Pick k row indices of V by MMR, starting from row 0 (S is V @ V.T, or empty)"""
+    n = V.shape[0]
+    
+    # Diversity term: running max similarity to selected docs (floored at 0)
+    max_sim = np.zeros(n, dtype=np.float32)
+    taken = np.zeros(n, dtype=bool)
+    chosen = np.empty(k, dtype=np.int64)
     
-    # Ensure all candidate vectors are numpy arrays and normalized
-    for candidate in candidates:
-        if isinstance(candidate['vec'], list):
-            candidate['vec'] = np.array(candidate['vec'])
-        candidate['vec'] = _normalize_vector(candidate['vec'])
+    pick = 0
+    taken[pick] = True
+    chosen[0] = pick
     
-    selected = []
-    remaining = candidates.copy()
+    for step in range(1, k):
+        # Similarities to the last pick: a precomputed row, or one matrix-vector product
+        np.maximum(max_sim, S[pick] if S.shape[0] else V @ V[pick], out=max_sim)
+        
+        # MMR score: λ * relevance - (1-λ) * max_similarity
+        mmr_scores = lam * rel - (1 - lam) * max_sim
+        mmr_scores[taken] = -np.inf
+        
+        pick = int(np.argmax(mmr_scores))
+        taken[pick] = True
+        chosen[step] = pick
     
-    # Select first document with highest relevance score
-    remaining.sort(key=lambda x: x['score'], reverse=True)
-    selected.append(remaining.pop(0))
+    return chosen
+
+
+if njit is not None:
+    from packages.shared._kernels import EMBEDDING_DIM, dot3072
     
-    # Iteratively select remaining documents
-    while len(selected) < k and remaining:
-        best_mmr = -float('inf')
-        best_idx = -1
+    @njit(fastmath=True, cache=True)
+    def _mmr_select(V, rel, lam, k, S):
+        """
+        Numba version of _mmr_select_numpy that prunes candidates by a relevance upper bound.
         
-        for i, candidate in enumerate(remaining):
-            # Relevance term: cosine similarity to query
-            relevance = _cosine_similarity(candidate['vec'], query_vec)
-            
-            # Diversity term: max cosine similarity to already selected docs
-            max_similarity = 0.0
-            for selected_doc in selected:
-                similarity = _cosine_similarity(candidate['vec'], selected_doc['vec'])
-                max_similarity = max(max_similarity, similarity)
-            
-            # MMR score: λ * relevance - (1-λ) * max_similarity
-            mmr_score = lambda_ * relevance - (1 - lambda_) * max_similarity
+        Candidates are scanned in descending relevance. Since max_sim >= 0, a candidate's
+        score is at most lam * rel[j], so the scan stops once that falls below the best score.
+        Similarities are computed lazily: max_sim[j] only folds in the picks made since j
+        was last evaluated, and a stale max_sim[j] still gives a valid upper bound.
+        """
+        n, d = V.shape
+        max_sim = np.zeros(n, np.float32)
+        n_seen = np.zeros(n, np.int64)  # picks already folded into max_sim[j]
+        taken = np.zeros(n, np.bool_)
+        chosen = np.empty(k, np.int64)
+        order = np.argsort(-rel)
+        
+        chosen[0] = 0
+        taken[0] = True
+        
+        for step in range(1, k):
+            best = np.float32(0.0)
+            best_j = -1
+            for j in order:
+                if taken[j]:
+                    continue
+                if best_j >= 0:
+                    if lam * rel[j] < best:
+                        break
+                    if lam * rel[j] - (1 - lam) * max_sim[j] < best:
+                        continue
+                
+                # Bring max_sim[j] up to date with the picks it has not seen
+                for s in range(n_seen[j], step):
+                    p = chosen[s]
+                    if S.shape[0] > 0:
+                        sim = S[p, j]
+                    elif d == EMBEDDING_DIM:
+                        sim = dot3072(V[p], V[j])
+                    else:
+                        sim = np.float32(0.0)
+                        for t in range(d):
+                            sim += V[p, t] * V[j, t]
+                    if sim > max_sim[j]:
+                        max_sim[j] = sim
+                n_seen[j] = step
+                
+                # Ties go to the lower index, matching argmax over score order
+                score = lam * rel[j] - (1 - lam) * max_sim[j]
+                if best_j < 0 or score > best or (score == best and j < best_j):
+                    best = score
+                    best_j = j
             
-            if mmr_score > best_mmr:
-                best_mmr = mmr_score
-                best_idx = i
+            taken[best_j] = True
+            chosen[step] = best_j
         
-        if best_idx >= 0:
-            selected.append(remaining.pop(best_idx))
+        return chosen
+else:
+    _mmr_select = _mmr_select_numpy
+
+
+def _mmr_select_torch(V: np.ndarray, query_vec: np.ndarray, lam: float, k: int) -> np.ndarray:
+    """CUDA version of _mmr_select_numpy on fp16 tensors; only chosen indices leave the device"""
+    n = V.shape[0]
+    device = torch.device('cuda')
+    V_t = torch.from_numpy(V).to(device, dtype=torch.float16)
+    q_t = torch.from_numpy(query_vec).to(device, dtype=torch.float16)
+    rel = (V_t @ q_t).float()
+    S = V_t @ V_t.T if n * n * 2 <= GPU_SIM_MATRIX_MAX_BYTES else None
+    
+    max_sim = torch.zeros(n, device=device)
+    taken = torch.zeros(n, dtype=torch.bool, device=device)
+    chosen = np.empty(k, dtype=np.int64)
+    
+    pick = 0
+    taken[pick] = True
+    chosen[0] = pick
+    
+    for step in range(1, k):
+        sims = S[pick] if S is not None else V_t @ V_t[pick]
+        torch.maximum(max_sim, sims.float(), out=max_sim)
+        
+        mmr_scores = lam * rel - (1 - lam) * max_sim
+        mmr_scores[taken] = -float('inf')
+        
+        pick = int(torch.argmax(mmr_scores))
+        taken[pick] = True
+        chosen[step] = pick
     
-    return selected
+    return chosen
 
 
 def _normalize_vector(vec: np.ndarray) -> np.ndarray:
     """Normalize vector to unit length"""
-    norm = np.linalg.norm(vec)
-    if norm == 0:
+    # vdot skips np.linalg.norm's dispatch and validation overhead
+    sq = float(np.vdot(vec, vec))
+    if sq == 0.0:
         return vec
-    return vec / norm
-
-
-def _cosine_similarity(vec1: np.ndarray, vec2: np.ndarray) -> float:
-    """Compute cosine similarity between two vectors"""
-    # Vectors should already be normalized
-    return float(np.dot(vec1, vec2))
+    return vec * (1.0 / math.sqrt(sq))
 
 
 def demo_mmr():
@@ -123,6 +280,10 @@ def demo_mmr():
         }
     ]
     
+    # Normalize once at load time, as ingestion does for stored embeddings
+    for c in candidates:
+        c['vec'] = _normalize_vector(c['vec'])
+    
     query_vec = np.array([1.0, 0.0, 0.0])
     
     print(f"📊 Input: {len(candidates)} candidates")
@@ -130,8 +291,9 @@ def demo_mmr():
     print()
     
     print("📋 Candidates:")
-    for c in candidates:
-        similarity = _cosine_similarity(_normalize_vector(c['vec']), _normalize_vector(query_vec))
+    # Candidates are unit vectors, so one matrix-vector product gives every cosine
+    sims = CandidateBatch.from_dicts(candidates).vecs @ _normalize_vector(query_vec.astype(np.float32))
+    for c, similarity in zip(candidates, sims):
         print(f"   {c['id']}: Score={c['score']:.2f}, Similarity={similarity:.2f} - {c['content']}")
     print()
     
@@ -149,7 +311,7 @@ def demo_mmr():
         else:
             print("   Balanced - should balance relevance and diversity")
         
-        selected = mmr(candidates.copy(), query_vec, lambda_val, k)
+        selected = mmr_dicts(candidates.copy(), query_vec, lambda_val, k)
         
         print("   Selected:")
         for i, doc in enumerate(selected, 1):
@@ -165,7 +327,7 @@ def demo_cache_key():
     
     def get_cache_key(query: str, chunk_id: int) -> str:
         """Generate cache key for query-chunk pair"""
-        query_hash = hashlib.sha256(query.encode()).hexdigest()[:16]
+        query_hash = hashlib.blake2b(query.encode(), digest_size=8).hexdigest()
         return f"rrank:{query_hash}:{chunk_id}"
     
     test_cases = [
@@ -17,11 +17,48 @@ branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
 
+# Rows backfilled per transaction
+BACKFILL_BATCH_SIZE = 100_000
+
+# An interrupted CONCURRENTLY build leaves an INVALID index that IF NOT EXISTS would keep
+# and the planner never uses, so drop it first and let the CREATE below rebuild it
+DROP_INVALID_INDEX_SQL = """
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = '{name}' AND NOT i.indisvalid
+        ) THEN
+            EXECUTE 'DROP INDEX {name}';
+        END IF;
+    END $$;
+"""
+
+
 def upgrade() -> None:
-    # Backfill any NULL tsv values
-    op.execute("UPDATE article_chunks SET tsv = to_tsvector('simple', content) WHERE tsv IS NULL")
+    # Backfill any NULL tsv values in bounded batches, each committed on its own so
+    # row locks and WAL stay small and an interrupted run resumes where it stopped
+    op.execute("CREATE INDEX IF NOT EXISTS idx_chunks_tsv_null ON article_chunks (id) WHERE tsv IS NULL")
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        while True:
+            result = bind.execute(sa.text("""
+                WITH batch AS (
+                    SELECT ctid FROM article_chunks
+                    WHERE tsv IS NULL
+                    LIMIT :batch_size
+                    FOR UPDATE SKIP LOCKED
+                )
+                UPDATE article_chunks a SET tsv = to_tsvector('simple', a.content)
+                FROM batch WHERE a.ctid = batch.ctid
+            """), {"batch_size": BACKFILL_BATCH_SIZE})
+            if result.rowcount == 0:
+                break
+    op.execute("DROP INDEX IF EXISTS idx_chunks_tsv_null")
     
     # Ensure required indexes exist (should already exist from migration 001)
+    for index_name in ('idx_chunks_vec', 'idx_chunks_tsv'):
+        op.execute(DROP_INVALID_INDEX_SQL.format(name=index_name))
     op.execute("CREATE INDEX IF NOT EXISTS idx_chunks_vec ON article_chunks USING ivfflat (embedding vector_cosine_ops) WITH (lists=200)")
     op.execute("CREATE INDEX IF NOT EXISTS idx_chunks_tsv ON article_chunks USING GIN(tsv)")
     op.execute("CREATE INDEX IF NOT EXISTS idx_articles_url_hash ON articles (url_hash)")
@@ -24,8 +24,8 @@ def upgrade() -> None:
     # Update the embedding column to use 3072 dimensions
     op.execute("ALTER TABLE article_chunks ALTER COLUMN embedding TYPE vector(3072)")
     
-    # Recreate the vector index with 3072 dimensions
-    op.execute("CREATE INDEX IF NOT EXISTS idx_chunks_vec ON article_chunks USING ivfflat (embedding vector_cosine_ops) WITH (lists=200)")
+    # No index here: ivfflat caps vector at 2000 dimensions, and the vector index
+    # is built concurrently over loaded data in migration 006
 
 
 def downgrade() -> None:
@@ -0,0 +1,45 @@
+"""Add simhash band index for near-duplicate lookup
+
+Revision ID: 004
+Revises: 003
+Create Date: 2025-09-01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Each 64-bit simhash is split into four 16-bit bands; any article within
+    # Hamming distance 3 shares at least one band value (pigeonhole)
+    op.create_table(
+        'simhash_bands',
+        sa.Column('band_no', sa.SmallInteger, nullable=False),
+        sa.Column('band_val', sa.SmallInteger, nullable=False),
+        sa.Column('article_id', sa.BigInteger, sa.ForeignKey('articles.id', ondelete='CASCADE'), nullable=False)
+    )
+    op.create_index('idx_simhash_bands_lookup', 'simhash_bands', ['band_no', 'band_val'])
+    op.create_index('idx_simhash_bands_article_id', 'simhash_bands', ['article_id'])
+    
+    # Backfill bands for existing articles, storing each 16-bit band as a signed smallint
+    op.execute("""
+        INSERT INTO simhash_bands (band_no, band_val, article_id)
+        SELECT b.band_no,
+               (((a.simhash >> (16 * b.band_no)) & 65535) - (((a.simhash >> (16 * b.band_no)) & 32768) << 1))::smallint,
+               a.id
+        FROM articles a
+        CROSS JOIN generate_series(0, 3) AS b(band_no)
+        WHERE a.simhash IS NOT NULL AND a.simhash <> 0
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('simhash_bands')
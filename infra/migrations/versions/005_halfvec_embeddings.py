@@ -0,0 +1,35 @@
+"""Store chunk embeddings as half-precision vectors
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-09-01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Drop the vector index before changing the column type
+    op.execute("DROP INDEX IF EXISTS idx_chunks_vec")
+    
+    # halfvec stores 2 bytes per dimension, halving table, index and transfer size
+    op.execute("ALTER TABLE article_chunks ALTER COLUMN embedding TYPE halfvec(3072) USING embedding::halfvec(3072)")
+    
+    # The halfvec index is built concurrently in migration 006
+
+
+def downgrade() -> None:
+    # Drop the halfvec index
+    op.execute("DROP INDEX IF EXISTS idx_chunks_vec")
+    
+    # Revert the embedding column to single precision
+    op.execute("ALTER TABLE article_chunks ALTER COLUMN embedding TYPE vector(3072) USING embedding::vector(3072)")
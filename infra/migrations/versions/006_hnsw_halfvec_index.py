@@ -0,0 +1,84 @@
+"""Build the HNSW chunk index concurrently
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-09-01
+
+"""
+import logging
+import math
+import threading
+from contextlib import contextmanager
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+# Seconds between index build progress log lines
+PROGRESS_POLL_SECONDS = 10
+
+_PROGRESS_SQL = sa.text("""
+    SELECT phase, blocks_done, blocks_total, tuples_done, tuples_total
+    FROM pg_stat_progress_create_index
+    WHERE relid = CAST(:table_name AS regclass)
+""")
+
+
+@contextmanager
+def _log_index_build_progress(table_name: str):
+    """Log pg_stat_progress_create_index for table_name while the block runs"""
+    # The migration connection is busy with the build, so poll from a second one;
+    # autocommit so every poll sees a fresh stats snapshot
+    engine = sa.create_engine(op.get_bind().engine.url, poolclass=sa.pool.NullPool, isolation_level='AUTOCOMMIT')
+    stop = threading.Event()
+    
+    def poll():
+        try:
+            with engine.connect() as conn:
+                while not stop.wait(PROGRESS_POLL_SECONDS):
+                    row = conn.execute(_PROGRESS_SQL, {"table_name": table_name}).first()
+                    if row is not None:
+                        logger.info(
+                            f"Index build on {table_name}: {row.phase} "
+                            f"(blocks {row.blocks_done}/{row.blocks_total}, tuples {row.tuples_done}/{row.tuples_total})"
+                        )
+        except Exception as e:
+            logger.warning(f"Index build progress polling stopped: {e}")
+    
+    thread = threading.Thread(target=poll, name='index-build-progress', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+        engine.dispose()
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps ingest writing during the build, but cannot run in a transaction
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_chunks_vec")
+        
+        # HNSW needs no training data and gives better recall per query at high dimensions
+        with _log_index_build_progress('article_chunks'):
+            op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_chunks_vec ON article_chunks USING hnsw (embedding halfvec_cosine_ops) WITH (m=16, ef_construction=64)")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_chunks_vec")
+        
+        # Size ivfflat lists from the loaded rows (about sqrt(rows)) so centroids fit the data
+        rows = op.get_bind().execute(sa.text("SELECT count(*) FROM article_chunks WHERE embedding IS NOT NULL")).scalar()
+        lists = max(100, int(math.sqrt(rows or 0)))
+        with _log_index_build_progress('article_chunks'):
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_chunks_vec ON article_chunks USING ivfflat (embedding halfvec_cosine_ops) WITH (lists={lists})")
@@ -0,0 +1,53 @@
+"""Normalize chunk embeddings to unit length on write
+
+Revision ID: 007
+Revises: 006
+Create Date: 2025-09-01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Stored unit vectors let retrieval score cosine similarity as a plain dot product.
+    # l2_normalize(halfvec) needs pgvector >= 0.7; older versions skip the trigger
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM pg_proc p
+                JOIN pg_type t ON t.oid = ANY(p.proargtypes)
+                WHERE p.proname = 'l2_normalize' AND t.typname = 'halfvec'
+            ) THEN
+                EXECUTE $fn$
+                    CREATE OR REPLACE FUNCTION article_chunks_normalize_embedding() RETURNS trigger AS $body$
+                    BEGIN
+                        IF NEW.embedding IS NOT NULL THEN
+                            NEW.embedding := l2_normalize(NEW.embedding);
+                        END IF;
+                        RETURN NEW;
+                    END;
+                    $body$ LANGUAGE plpgsql
+                $fn$;
+                EXECUTE 'DROP TRIGGER IF EXISTS trg_chunks_normalize_embedding ON article_chunks';
+                EXECUTE 'CREATE TRIGGER trg_chunks_normalize_embedding
+                         BEFORE INSERT OR UPDATE OF embedding ON article_chunks
+                         FOR EACH ROW EXECUTE FUNCTION article_chunks_normalize_embedding()';
+            END IF;
+        END
+        $$;
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_chunks_normalize_embedding ON article_chunks")
+    op.execute("DROP FUNCTION IF EXISTS article_chunks_normalize_embedding()")
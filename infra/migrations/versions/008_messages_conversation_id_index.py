@@ -0,0 +1,30 @@
+"""Index messages by conversation and id for recent-message paging
+
+Revision ID: 008
+Revises: 007
+Create Date: 2025-09-01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Recent-message reads filter on conversation_id and walk id backwards, so the
+    # composite index serves both the filter and the ORDER BY ... LIMIT; it also
+    # covers every lookup the single-column index did
+    op.create_index('idx_messages_conv_id', 'messages', ['conversation_id', sa.text('id DESC')])
+    op.drop_index('idx_messages_conversation_id', table_name='messages')
+
+
+def downgrade() -> None:
+    op.create_index('idx_messages_conversation_id', 'messages', ['conversation_id'])
+    op.drop_index('idx_messages_conv_id', table_name='messages')
@@ -1,14 +1,134 @@
 """Shared embedding client for both ingestion and retrieval"""
 
 import os
+import asyncio
 import logging
 import hashlib
-from typing import List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
 import numpy as np
 
+from .lru import TTLCache
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None  # Memory-only embedding cache
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None  # Fall back to filling rows one at a time in NumPy
+
 logger = logging.getLogger(__name__)
 
-def embed_texts(texts: List[str]) -> List[List[float]]:
+# OpenAI embedding model (3072 dimensions as per requirements)
+OPENAI_EMBED_MODEL = "text-embedding-3-large"
+EMBEDDING_DIM = 3072
+
+# Request batching: approximate token budget per request, API cap on inputs per
+# request, and how many requests may be in flight at once
+OPENAI_EMBED_BATCH_TOKENS = 6000
+OPENAI_EMBED_BATCH_MAX_ITEMS = 2048
+OPENAI_EMBED_CONCURRENCY = 8
+
+# Retries with exponential backoff on 429/5xx responses (handled by the OpenAI client)
+OPENAI_EMBED_MAX_RETRIES = 5
+
+# Cache key "model" for the deterministic fallback vectors; bump the version
+# whenever the generator changes so stale cached vectors are not reused
+DETERMINISTIC_EMBED_MODEL = "deterministic-3072-v3"
+
+# Embedding cache: in-memory LRU entries and their lifetime, and an on-disk cache
+# directory (empty disables it); same variables and defaults as the API settings
+EMBEDDING_CACHE_SIZE = int(os.getenv('EMBEDDING_CACHE_SIZE', '2048'))
+EMBEDDING_CACHE_TTL_SECONDS = float(os.getenv('EMBEDDING_CACHE_TTL_SECONDS', '600'))
+EMBEDDING_CACHE_DIR = os.getenv('EMBEDDING_CACHE_DIR', '/var/cache/barta/emb')
+
+class _EmbeddingCache:
+    """Two-level embedding cache (memory LRU over an optional disk cache) keyed by sha256(model || text)"""
+    
+    def __init__(self, maxsize: int, ttl_seconds: float, directory: str):
+        self.directory = directory
+        self._memory = TTLCache(maxsize, ttl_seconds)
+        self._disk = None
+        self._disk_initialized = False
+    
+    def _get_disk(self):
+        """Open the disk cache on first use; None if unavailable"""
+        if not self._disk_initialized:
+            self._disk_initialized = True
+            if diskcache is not None and self.directory:
+                try:
+                    self._disk = diskcache.Cache(self.directory, eviction_policy='least-recently-used')
+                except Exception as e:
+                    logger.warning(f"Embedding disk cache unavailable at {self.directory}: {e}")
+        return self._disk
+    
+    def get_or_compute(self, texts: List[str], model: str, compute: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Return embeddings for texts, computing only the ones cached at neither level.
+        
+        Args:
+            texts: List of text strings to embed
+            model: Model name the vectors belong to (part of the cache key)
+            compute: Function embedding a list of texts
+            
+        Returns:
+            float32 array of shape (len(texts), EMBEDDING_DIM) in the same order as texts
+        """
+        if not texts:
+            return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        
+        keys = [hashlib.sha256((model + text).encode()).digest() for text in texts]
+        vectors: List[Optional[np.ndarray]] = self._memory.get_many(keys)
+        disk = self._get_disk()
+        
+        if disk is not None:
+            for i, key in enumerate(keys):
+                if vectors[i] is None:
+                    data = disk.get(_F16_DISK_PREFIX + key)
+                    if data is not None:
+                        vectors[i] = _unpack_f16(data)
+                        self._memory.put(key, vectors[i])
+        
+        # Texts cached nowhere, deduplicated so each is embedded once
+        misses: "OrderedDict[bytes, List[int]]" = OrderedDict()
+        for i, key in enumerate(keys):
+            if vectors[i] is None:
+                misses.setdefault(key, []).append(i)
+        
+        if misses:
+            computed = compute([texts[positions[0]] for positions in misses.values()])
+            for (key, positions), vector in zip(misses.items(), np.asarray(computed, dtype=np.float32)):
+                for i in positions:
+                    vectors[i] = vector
+                self._memory.put(key, vector)
+                if disk is not None:
+                    disk.set(_F16_DISK_PREFIX + key, _pack_f16(vector))
+        
+        logger.debug(f"Embedding cache: {len(texts) - len(misses)} hits, {len(misses)} misses")
+        return np.vstack(vectors)
+
+
+_embedding_cache = _EmbeddingCache(EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_TTL_SECONDS, EMBEDDING_CACHE_DIR)
+
+# Disk cache keys are prefixed with the value format so a format change never misreads old entries
+_F16_DISK_PREFIX = b"f16:"
+
+
+def _pack_f16(vector: np.ndarray) -> bytes:
+    """Serialize a vector as float16, half the float32 footprint at negligible cosine error"""
+    return np.asarray(vector, dtype=np.float16).tobytes()
+
+
+def _unpack_f16(data: bytes) -> np.ndarray:
+    """Inverse of _pack_f16, widened back to float32"""
+    return np.frombuffer(data, dtype=np.float16).astype(np.float32)
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
     """
     Embed a list of texts using OpenAI or deterministic fallback.
     
@@ -16,67 +136,136 @@ def embed_texts(texts: List[str]) -> List[List[float]]:
         texts: List of text strings to embed
         
     Returns:
-        List of embedding vectors (3072-dimensional for text-embedding-3-large)
+        float32 array of shape (len(texts), 3072), matching text-embedding-3-large
     """
     openai_api_key = os.getenv('OPENAI_API_KEY')
     
     if openai_api_key:
         try:
-            return _embed_with_openai(texts, openai_api_key)
+            return _embedding_cache.get_or_compute(
+                texts, OPENAI_EMBED_MODEL, lambda batch: _embed_with_openai(batch, openai_api_key)
+            )
         except Exception as e:
             logger.warning(f"OpenAI embedding failed: {e}, falling back to deterministic vectors")
-            return _embed_deterministic(texts)
     else:
         logger.info("No OpenAI API key found, using deterministic vectors")
-        return _embed_deterministic(texts)
+    
+    # Cached separately from OpenAI vectors so a fallback never poisons their keys
+    return _embedding_cache.get_or_compute(texts, DETERMINISTIC_EMBED_MODEL, _embed_deterministic)
 
 
-def _embed_with_openai(texts: List[str], api_key: str) -> List[List[float]]:
-    """Embed texts using OpenAI API"""
+def _embed_with_openai(texts: List[str], api_key: str) -> np.ndarray:
+    """Embed texts using OpenAI API, sending token-bounded batches concurrently"""
     try:
-        import openai
-        client = openai.OpenAI(api_key=api_key)
-        
-        response = client.embeddings.create(
-            input=texts,
-            model="text-embedding-3-large",  # 3072 dimensions as per requirements
-        )
-        
-        embeddings = [item.embedding for item in response.data]
-        logger.info(f"Successfully embedded {len(texts)} texts using OpenAI")
-        return embeddings
+        coro = _embed_with_openai_async(texts, api_key)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        # Called from inside an event loop: run the batches on a fresh loop in a worker thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
         
-    except ImportError:
-        logger.warning("OpenAI package not available, using deterministic fallback")
-        return _embed_deterministic(texts)
     except Exception as e:
         logger.error(f"OpenAI API error: {e}")
         raise
 
 
-def _embed_deterministic(texts: List[str]) -> List[List[float]]:
-    """Generate deterministic pseudo-vectors based on text content"""
-    embeddings = []
+async def _embed_with_openai_async(texts: List[str], api_key: str) -> np.ndarray:
+    """Send every batch of texts to the embeddings API concurrently and flatten in order"""
+    import openai
     
-    for text in texts:
-        if not text.strip():
-            # Empty text gets zero vector
-            embeddings.append([0.0] * 3072)
-            continue
-            
-        # Use SHA256 hash of text as seed for reproducible results
-        seed = int(hashlib.sha256(text.encode()).hexdigest()[:8], 16)
-        np.random.seed(seed % (2**32))
+    semaphore = asyncio.Semaphore(OPENAI_EMBED_CONCURRENCY)
+    
+    async with openai.AsyncOpenAI(api_key=api_key, max_retries=OPENAI_EMBED_MAX_RETRIES) as client:
+        async def embed_batch(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                response = await client.embeddings.create(input=batch, model=OPENAI_EMBED_MODEL)
+            return [item.embedding for item in response.data]
         
-        # Generate 3072-dimensional vector (compatible with text-embedding-3-large)
-        vector = np.random.normal(0, 1, 3072)
+        results = await asyncio.gather(*[
+            embed_batch(texts[start:end]) for start, end in _batch_bounds(texts)
+        ])
+    
+    # Normalize once at write time so retrieval can score with plain dot products
+    embeddings = np.asarray([embedding for batch in results for embedding in batch], dtype=np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True).clip(min=1e-12)
+    logger.info(f"Successfully embedded {len(texts)} texts using OpenAI in {len(results)} requests")
+    return embeddings
+
+
+def _batch_bounds(texts: List[str]) -> List[Tuple[int, int]]:
+    """
+    Split texts into contiguous batches bounded by an approximate token budget.
+    
+    Args:
+        texts: List of text strings to embed
         
-        # Normalize to unit vector
-        norm = np.linalg.norm(vector)
-        if norm > 0:
-            vector = vector / norm
-            
-        embeddings.append(vector.tolist())
+    Returns:
+        List of (start, end) index pairs covering texts in order
+    """
+    bounds = []
+    start = 0
+    batch_tokens = 0
+    for i, text in enumerate(texts):
+        # Roughly 4 characters per token for English text
+        tokens = len(text) // 4 + 1
+        if i > start and (batch_tokens + tokens > OPENAI_EMBED_BATCH_TOKENS
+                          or i - start >= OPENAI_EMBED_BATCH_MAX_ITEMS):
+            bounds.append((start, i))
+            start = i
+            batch_tokens = 0
+        batch_tokens += tokens
+    if start < len(texts):
+        bounds.append((start, len(texts)))
+    return bounds
+
+
+def _embed_deterministic(texts: List[str]) -> np.ndarray:
+    """Generate deterministic pseudo-vectors based on text content"""
+    # Use a 4-byte BLAKE2b digest of each text as its seed for reproducible results
+    # (faster than SHA-256 without hardware SHA support, and in the standard library)
+    seeds = np.frombuffer(
+        b''.join(hashlib.blake2b(text.encode(), digest_size=4).digest() for text in texts),
+        dtype='<u4'
+    ).astype(np.uint32)
+    
+    vectors = np.empty((len(texts), EMBEDDING_DIM), dtype=np.float32)
+    _fill_normalized(seeds, vectors)
+    
+    # Empty texts get zero vectors
+    for i, text in enumerate(texts):
+        if not text.strip():
+            vectors[i] = 0.0
     
     logger.info(f"Generated {len(texts)} deterministic embeddings")
-    return embeddings
\ No newline at end of file
+    return vectors
+
+
+def _fill_normalized_numpy(seeds: np.ndarray, out: np.ndarray) -> None:
+    """Fill each row of out with unit-normalized Mersenne Twister normals seeded from seeds"""
+    for i, seed in enumerate(seeds):
+        # A local RandomState leaves the global NumPy RNG state untouched
+        row = np.random.RandomState(seed).standard_normal(out.shape[1])
+        # Same float64 norm expression and in-place division as the Numba kernel,
+        # so both paths produce bit-identical vectors
+        norm = np.sqrt((row * row).sum())
+        if norm > 0:
+            row /= norm
+        out[i] = row
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _fill_normalized(seeds, out):
+        """Numba version of _fill_normalized_numpy, one row per parallel iteration"""
+        for i in prange(out.shape[0]):
+            # Numba keeps a Mersenne Twister per thread, matching np.random.RandomState
+            np.random.seed(seeds[i])
+            row = np.random.standard_normal(out.shape[1])
+            norm = np.sqrt((row * row).sum())
+            if norm > 0:
+                row /= norm
+            out[i] = row
+else:
+    _fill_normalized = _fill_normalized_numpy
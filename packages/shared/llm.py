@@ -1,15 +1,337 @@
 """Shared LLM client with streaming support and graceful fallback"""
 
 import os
+import asyncio
+import atexit
+import functools
+import hashlib
 import logging
+import random
+import threading
 import time
-from typing import Iterator, List, Dict, Any
-import hashlib
+from pathlib import Path
+from typing import AsyncIterator, Iterator, List, Dict, Any, Optional, Tuple
+import httpx
+import orjson
+
+from .lru import TTLCache
+
+try:
+    from dotenv import dotenv_values
+except ImportError:
+    dotenv_values = None  # Fall back to scanning .env lines by hand
+
+try:
+    import openai
+except ImportError:
+    openai = None  # Fake responses only
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None  # Stream through AsyncOpenAI only
 
 logger = logging.getLogger(__name__)
+
+# Project root .env, read for the API key when it is not in the environment
+_ENV_PATH = Path(__file__).resolve().parents[3] / '.env'
+
+# Connection pool limits shared by every OpenAI request from this process
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+
+# Attempts per OpenAI request on rate limits, server errors and connection failures;
+# retries back off exponentially with jitter before any token is emitted
+OPENAI_CHAT_MAX_ATTEMPTS = 3
+_RETRY_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504})
+_RETRY_MIN_SECONDS = 1.0
+_RETRY_MAX_SECONDS = 8.0
+
+# Shared OpenAI clients, so requests reuse pooled keep-alive connections
+_SYNC_CLIENT = None
+_SYNC_CLIENT_KEY: Optional[str] = None
+_ASYNC_CLIENT = None
+_ASYNC_CLIENT_KEY: Optional[tuple] = None
+_client_lock = threading.Lock()
+# Close tasks for evicted async clients, referenced until they finish
+_closing_tasks = set()
+
+# Completions at or below this temperature are treated as deterministic and cached
+_COMPLETE_CACHE_MAX_TEMPERATURE = 0.01
+_COMPLETE_CACHE_SIZE = 1024
+_COMPLETE_CACHE_TTL_SECONDS = float(os.getenv('BARTA_LLM_CACHE_TTL', '600'))
+
+# Concurrent requests in flight per complete_batch call, to stay within rate limits
+_COMPLETE_BATCH_CONCURRENCY = 20
+
+# Streamed deltas are merged into frames of at least this many characters, unless this
+# long has passed since the last frame; the first delta is always sent immediately
+_COALESCE_MIN_CHARS = 32
+_COALESCE_MAX_DELAY_SECONDS = 0.03
+
+
+def _parse_fake_delay_ms(raw: str) -> float:
+    """Parse BARTA_FAKE_DELAY_MS into seconds, falling back to 0 for malformed values"""
+    try:
+        delay_ms = float(raw)
+    except ValueError:
+        delay_ms = float('nan')
+    if not 0 <= delay_ms < float('inf'):
+        logger.warning(f"Ignoring invalid BARTA_FAKE_DELAY_MS={raw!r}, expected a non-negative number of milliseconds")
+        return 0.0
+    return delay_ms / 1000
+
+
+# Pause between fake stream parts to mimic network pacing (0 streams back-to-back)
+_FAKE_DELAY_SECONDS = _parse_fake_delay_ms(os.getenv('BARTA_FAKE_DELAY_MS') or '0')
+
+# Static parts of the fake response, around the line quoting the user's query
+_FAKE_PREFIX: Tuple[str, ...] = ("## TL;DR\n\n",)
+_FAKE_SUFFIX: Tuple[str, ...] = (
+    "## What happened\n\n",
+    "Recent developments indicate ongoing changes in the situation. ",
+    "Multiple sources report significant activity in the area [1]. ",
+    "Key stakeholders have provided statements [2].\n\n",
+    "## Why it matters\n\n",
+    "This development has implications for future policy decisions. ",
+    "The impact extends beyond immediate concerns [3].\n\n",
+    "## Unknowns\n\n",
+    "Several questions remain unanswered about long-term effects.\n\n",
+    "## Timeline\n\n",
+    "- Recent: Initial reports emerged\n",
+    "- Current: Ongoing assessment\n",
+    "- Future: Further developments expected\n\n",
+    "## Sources\n\n",
+    "[1] Example Source 1 (example.com)\n",
+    "[2] Example Source 2 (news.example.com)\n",
+    "[3] Example Source 3 (analysis.example.com)\n"
+)
+
+# Fake completions, chosen by keywords in the first characters of the last user message
+_FAKE_CLASSIFY_CHARS = 512
+_PLAN_KEYWORDS: Tuple[str, ...] = ("plan",)
+_SUMMARY_KEYWORDS: Tuple[str, ...] = ("summarize",)
+_FAKE_PLAN_RESPONSE = """• Analyze the query and available information
+• Identify key facts and developments
+• Determine significance and implications
+• Note any gaps or unknowns
+• Structure findings clearly"""
+_FAKE_SUMMARY_RESPONSE = "Previous discussion covered recent developments and their implications for stakeholders."
+_FAKE_DEFAULT_RESPONSE = "I understand your request and will provide a comprehensive response based on available information."
+
+# Opt-in direct aiohttp streaming that bypasses the OpenAI SDK's httpx transport
+_USE_AIOHTTP_OPENAI = os.getenv('BARTA_USE_AIOHTTP_OPENAI') == '1'
+_OPENAI_CHAT_URL = "https://api.openai.com/v1/chat/completions"
+_SSE_DATA_PREFIX = b"data: "
+_SSE_DONE = b"[DONE]"
+_AIOHTTP_SESSION = None
+_AIOHTTP_SESSION_LOOP = None
+
+if _USE_AIOHTTP_OPENAI and aiohttp is None:
+    logger.warning("BARTA_USE_AIOHTTP_OPENAI is set but aiohttp is not installed, streaming through AsyncOpenAI")
+
 # Force reload for API key fix - testing integration
 
 
+@functools.lru_cache(maxsize=1)
+def _get_openai_api_key() -> Optional[str]:
+    """
+    Resolve the OpenAI API key once per process.
+    
+    Checks the environment first, then the project root .env file, so the hot
+    request path does no file I/O after the first call. Tests that change the
+    key should call _get_openai_api_key.cache_clear().
+    
+    Returns:
+        The API key, or None if it is not configured
+    """
+    openai_api_key = os.getenv('OPENAI_API_KEY')
+    if openai_api_key:
+        return openai_api_key
+    
+    try:
+        if _ENV_PATH.exists():
+            if dotenv_values is not None:
+                openai_api_key = dotenv_values(_ENV_PATH).get('OPENAI_API_KEY')
+            else:
+                with open(_ENV_PATH, 'r') as f:
+                    for line in f:
+                        if line.startswith('OPENAI_API_KEY='):
+                            openai_api_key = line.split('=', 1)[1].strip()
+                            break
+            if openai_api_key:
+                logger.info("Loaded OpenAI API key from .env file")
+    except Exception as e:
+        logger.warning(f"Could not load .env file: {e}")
+    
+    return openai_api_key or None
+
+
+def _get_client(api_key: str):
+    """Return the shared sync OpenAI client, rebuilding it only when the key changes"""
+    global _SYNC_CLIENT, _SYNC_CLIENT_KEY
+    with _client_lock:
+        if _SYNC_CLIENT is None or _SYNC_CLIENT_KEY != api_key:
+            if _SYNC_CLIENT is not None:
+                _SYNC_CLIENT.close()
+            _SYNC_CLIENT = openai.OpenAI(
+                api_key=api_key,
+                max_retries=OPENAI_CHAT_MAX_ATTEMPTS - 1,
+                http_client=httpx.Client(limits=_HTTP_LIMITS)
+            )
+            _SYNC_CLIENT_KEY = api_key
+        return _SYNC_CLIENT
+
+
+def _get_async_client(api_key: str):
+    """
+    Return the shared AsyncOpenAI client for the running event loop.
+    
+    httpx async connections belong to the loop that opened them, so the client
+    is rebuilt when the key or the loop changes.
+    """
+    global _ASYNC_CLIENT, _ASYNC_CLIENT_KEY
+    key = (api_key, asyncio.get_running_loop())
+    with _client_lock:
+        if _ASYNC_CLIENT is None or _ASYNC_CLIENT_KEY[0] != key[0] or _ASYNC_CLIENT_KEY[1] is not key[1]:
+            if _ASYNC_CLIENT is not None:
+                _close_replaced(_ASYNC_CLIENT, _ASYNC_CLIENT_KEY[1])
+            _ASYNC_CLIENT = openai.AsyncOpenAI(
+                api_key=api_key,
+                max_retries=OPENAI_CHAT_MAX_ATTEMPTS - 1,
+                http_client=httpx.AsyncClient(limits=_HTTP_LIMITS)
+            )
+            _ASYNC_CLIENT_KEY = key
+        return _ASYNC_CLIENT
+
+
+def _get_aiohttp_session():
+    """Return the shared aiohttp session for the running event loop"""
+    global _AIOHTTP_SESSION, _AIOHTTP_SESSION_LOOP
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        if _AIOHTTP_SESSION is None or _AIOHTTP_SESSION.closed or _AIOHTTP_SESSION_LOOP is not loop:
+            if _AIOHTTP_SESSION is not None and not _AIOHTTP_SESSION.closed:
+                _close_replaced(_AIOHTTP_SESSION, _AIOHTTP_SESSION_LOOP)
+            _AIOHTTP_SESSION = _new_aiohttp_session()
+            _AIOHTTP_SESSION_LOOP = loop
+        return _AIOHTTP_SESSION
+
+
+def _close_replaced(resource, owner_loop) -> None:
+    """
+    Close an async client or session evicted from its shared slot, on the loop that owns it.
+    
+    Its connections can only be closed from that loop: the close is scheduled there
+    when the loop is current or still running elsewhere. A loop that has already
+    closed took its transports with it, so there is nothing left to await.
+    """
+    if owner_loop is None or owner_loop.is_closed():
+        logger.debug("Dropping async LLM client whose event loop has closed")
+        return
+    
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+    
+    if owner_loop is running_loop:
+        task = owner_loop.create_task(resource.close())
+        # Hold a reference until the close finishes so the task is not collected
+        _closing_tasks.add(task)
+        task.add_done_callback(_closing_tasks.discard)
+    elif owner_loop.is_running():
+        asyncio.run_coroutine_threadsafe(resource.close(), owner_loop)
+
+
+async def _release_loop_clients() -> None:
+    """Close the shared async client and aiohttp session if they belong to the running loop"""
+    global _ASYNC_CLIENT, _ASYNC_CLIENT_KEY, _AIOHTTP_SESSION, _AIOHTTP_SESSION_LOOP
+    loop = asyncio.get_running_loop()
+    client = session = None
+    with _client_lock:
+        if _ASYNC_CLIENT is not None and _ASYNC_CLIENT_KEY[1] is loop:
+            client, _ASYNC_CLIENT, _ASYNC_CLIENT_KEY = _ASYNC_CLIENT, None, None
+        if _AIOHTTP_SESSION is not None and _AIOHTTP_SESSION_LOOP is loop:
+            session, _AIOHTTP_SESSION, _AIOHTTP_SESSION_LOOP = _AIOHTTP_SESSION, None, None
+    
+    if session is not None and not session.closed:
+        await session.close()
+    if client is not None:
+        await client.close()
+
+
+def _new_aiohttp_session():
+    """Build an aiohttp session whose keep-alive pool is sized for concurrent chat streams"""
+    connector = aiohttp.TCPConnector(limit=200, limit_per_host=100, ttl_dns_cache=300, keepalive_timeout=30)
+    return aiohttp.ClientSession(connector=connector)
+
+
+def configure_llm(session=None) -> None:
+    """
+    Bind the shared async LLM connection pools to the running event loop.
+    
+    Call once at application startup from the loop that serves requests, so the
+    first chat reuses warm pools instead of building them. Pair with aclose_llm()
+    at shutdown.
+    
+    Args:
+        session: aiohttp.ClientSession to use for direct streaming; by default one
+            is created when BARTA_USE_AIOHTTP_OPENAI is enabled
+    """
+    global _AIOHTTP_SESSION, _AIOHTTP_SESSION_LOOP
+    if session is None and _USE_AIOHTTP_OPENAI and aiohttp is not None:
+        session = _new_aiohttp_session()
+    
+    if session is not None:
+        with _client_lock:
+            _AIOHTTP_SESSION = session
+            _AIOHTTP_SESSION_LOOP = asyncio.get_running_loop()
+    
+    openai_api_key = _get_openai_api_key()
+    if openai_api_key and openai is not None:
+        _get_async_client(openai_api_key)
+    
+    logger.info("Configured shared LLM connection pools")
+
+
+async def aclose_llm() -> None:
+    """Close the shared async LLM connection pools"""
+    global _ASYNC_CLIENT, _ASYNC_CLIENT_KEY, _AIOHTTP_SESSION, _AIOHTTP_SESSION_LOOP
+    with _client_lock:
+        client, _ASYNC_CLIENT, _ASYNC_CLIENT_KEY = _ASYNC_CLIENT, None, None
+        session, _AIOHTTP_SESSION, _AIOHTTP_SESSION_LOOP = _AIOHTTP_SESSION, None, None
+    
+    if session is not None and not session.closed:
+        await session.close()
+    if client is not None:
+        await client.close()
+
+
+def _retry_delay(attempt: int) -> float:
+    """Seconds to wait before retry number attempt + 1 (random exponential backoff)"""
+    return random.uniform(_RETRY_MIN_SECONDS, min(_RETRY_MAX_SECONDS, _RETRY_MIN_SECONDS * 2 ** (attempt + 1)))
+
+
+@atexit.register
+def _close_clients() -> None:
+    """Close the pooled sync client's connections at interpreter exit"""
+    if _SYNC_CLIENT is not None:
+        _SYNC_CLIENT.close()
+
+
+class _CompletionCache(TTLCache):
+    """LRU cache of completion texts with a TTL, keyed by request digest"""
+    
+    @staticmethod
+    def key(messages: List[Dict[str, str]], model: str, max_tokens: int) -> bytes:
+        """Digest the request into a compact cache key"""
+        return hashlib.blake2b(orjson.dumps((model, messages, max_tokens)), digest_size=16).digest()
+
+
+# Repeated deterministic prompts (plans, summaries) skip the network round trip
+_complete_cache = _CompletionCache(_COMPLETE_CACHE_SIZE, _COMPLETE_CACHE_TTL_SECONDS)
+
+
 def stream_chat(messages: List[Dict[str, str]], *, model: str, temperature: float, max_tokens: int) -> Iterator[str]:
     """
     Stream chat completion tokens.
@@ -23,25 +345,11 @@ def stream_chat(messages: List[Dict[str, str]], *, model: str, temperature: floa
     Yields:
         str: Individual tokens from the response
     """
-    # Try to load from .env file if not already set
-    openai_api_key = os.getenv('OPENAI_API_KEY')
-    if not openai_api_key:
-        try:
-            # Try to read from project root .env file
-            env_path = os.path.join(os.path.dirname(__file__), '../../../.env')
-            if os.path.exists(env_path):
-                with open(env_path, 'r') as f:
-                    for line in f:
-                        if line.startswith('OPENAI_API_KEY='):
-                            openai_api_key = line.split('=', 1)[1].strip()
-                            logger.info("Loaded OpenAI API key from .env file")
-                            break
-        except Exception as e:
-            logger.warning(f"Could not load .env file: {e}")
+    openai_api_key = _get_openai_api_key()
     
     if openai_api_key:
         try:
-            yield from _stream_openai(messages, model, temperature, max_tokens, openai_api_key)
+            yield from _coalesce(_stream_openai(messages, model, temperature, max_tokens, openai_api_key))
         except Exception as e:
             logger.warning(f"OpenAI streaming failed: {e}, falling back to fake stream")
             yield from _fake_stream(messages)
@@ -50,6 +358,39 @@ def stream_chat(messages: List[Dict[str, str]], *, model: str, temperature: floa
         yield from _fake_stream(messages)
 
 
+async def astream_chat(messages: List[Dict[str, str]], *, model: str, temperature: float, max_tokens: int) -> AsyncIterator[str]:
+    """
+    Stream chat completion tokens without blocking the event loop.
+    
+    Uses AsyncOpenAI so many concurrent streams share the loop thread instead of
+    each holding a worker thread for the length of the response.
+    
+    Args:
+        messages: List of message dicts with 'role' and 'content' keys
+        model: Model name (e.g., 'gpt-4o-mini')
+        temperature: Temperature parameter
+        max_tokens: Maximum tokens to generate
+        
+    Yields:
+        str: Individual tokens from the response
+    """
+    openai_api_key = _get_openai_api_key()
+    
+    if openai_api_key:
+        stream_openai = _stream_openai_aiohttp if _USE_AIOHTTP_OPENAI and aiohttp is not None else _stream_openai_async
+        try:
+            async for token in _coalesce_async(stream_openai(messages, model, temperature, max_tokens, openai_api_key)):
+                yield token
+        except Exception as e:
+            logger.warning(f"OpenAI streaming failed: {e}, falling back to fake stream")
+            async for token in _fake_stream_async(messages):
+                yield token
+    else:
+        logger.info("No OpenAI API key found, using fake stream")
+        async for token in _fake_stream_async(messages):
+            yield token
+
+
 def complete(messages: List[Dict[str, str]], *, model: str, temperature: float, max_tokens: int) -> str:
     """
     Complete chat completion (non-streaming).
@@ -63,38 +404,146 @@ def complete(messages: List[Dict[str, str]], *, model: str, temperature: float,
     Returns:
         str: Complete response text
     """
-    # Try to load from .env file if not already set
-    openai_api_key = os.getenv('OPENAI_API_KEY')
-    if not openai_api_key:
-        try:
-            # Try to read from project root .env file
-            env_path = os.path.join(os.path.dirname(__file__), '../../../.env')
-            if os.path.exists(env_path):
-                with open(env_path, 'r') as f:
-                    for line in f:
-                        if line.startswith('OPENAI_API_KEY='):
-                            openai_api_key = line.split('=', 1)[1].strip()
-                            logger.info("Loaded OpenAI API key from .env file")
-                            break
-        except Exception as e:
-            logger.warning(f"Could not load .env file: {e}")
+    openai_api_key = _get_openai_api_key()
     
     if openai_api_key:
+        cache_key = None
+        if temperature <= _COMPLETE_CACHE_MAX_TEMPERATURE:
+            cache_key = _CompletionCache.key(messages, model, max_tokens)
+            cached = _complete_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            return _complete_openai(messages, model, temperature, max_tokens, openai_api_key)
+            content = _complete_openai(messages, model, temperature, max_tokens, openai_api_key)
         except Exception as e:
             logger.warning(f"OpenAI completion failed: {e}, falling back to fake completion")
             return _fake_complete(messages)
+        
+        if cache_key is not None:
+            _complete_cache.put(cache_key, content)
+        return content
     else:
         logger.info("No OpenAI API key found, using fake completion")
         return _fake_complete(messages)
 
 
+async def complete_batch(prompt_sets: List[List[Dict[str, str]]], *, model: str, temperature: float, max_tokens: int) -> List[str]:
+    """
+    Complete several independent chats concurrently.
+    
+    Requests share the pooled AsyncOpenAI client, so the batch costs about one
+    round trip instead of one per prompt. A prompt whose request fails falls back
+    to the fake completion without affecting the others.
+    
+    Args:
+        prompt_sets: List of message lists, one per completion
+        model: Model name (e.g., 'gpt-4o-mini')
+        temperature: Temperature parameter
+        max_tokens: Maximum tokens to generate per completion
+        
+    Returns:
+        List[str]: Response texts in the same order as prompt_sets
+    """
+    openai_api_key = _get_openai_api_key()
+    if not openai_api_key:
+        logger.info("No OpenAI API key found, using fake completion")
+        return [_fake_complete(messages) for messages in prompt_sets]
+    
+    if openai is None:
+        logger.warning("OpenAI package not available, using fake completion")
+        return [_fake_complete(messages) for messages in prompt_sets]
+    
+    client = _get_async_client(openai_api_key)
+    cacheable = temperature <= _COMPLETE_CACHE_MAX_TEMPERATURE
+    semaphore = asyncio.Semaphore(_COMPLETE_BATCH_CONCURRENCY)
+    
+    async def complete_one(messages: List[Dict[str, str]]) -> str:
+        cache_key = _CompletionCache.key(messages, model, max_tokens) if cacheable else None
+        if cache_key is not None:
+            cached = _complete_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        async with semaphore:
+            try:
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+            except Exception as e:
+                logger.warning(f"OpenAI completion failed: {e}, falling back to fake completion")
+                return _fake_complete(messages)
+        
+        content = response.choices[0].message.content or ""
+        if cache_key is not None:
+            _complete_cache.put(cache_key, content)
+        return content
+    
+    results = await asyncio.gather(*(complete_one(messages) for messages in prompt_sets))
+    logger.info(f"Completed batch of {len(prompt_sets)} responses from OpenAI model {model}")
+    return list(results)
+
+
+def complete_batch_sync(prompt_sets: List[List[Dict[str, str]]], *, model: str, temperature: float, max_tokens: int) -> List[str]:
+    """Blocking complete_batch for callers without an event loop (e.g. CLI scripts)"""
+    async def run_batch() -> List[str]:
+        # The pools opened here belong to this call's private loop, so close them with it
+        try:
+            return await complete_batch(prompt_sets, model=model, temperature=temperature, max_tokens=max_tokens)
+        finally:
+            await _release_loop_clients()
+    
+    return asyncio.run(run_batch())
+
+
+def _coalesce(tokens: Iterator[str]) -> Iterator[str]:
+    """Merge runs of small deltas so each SSE frame carries more text"""
+    buf: List[str] = []
+    buf_len = 0
+    last_flush = float('-inf')
+    for token in tokens:
+        buf.append(token)
+        buf_len += len(token)
+        now = time.monotonic()
+        if buf_len >= _COALESCE_MIN_CHARS or now - last_flush > _COALESCE_MAX_DELAY_SECONDS:
+            yield "".join(buf)
+            buf.clear()
+            buf_len = 0
+            last_flush = now
+    if buf:
+        yield "".join(buf)
+
+
+async def _coalesce_async(tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Async version of _coalesce"""
+    buf: List[str] = []
+    buf_len = 0
+    last_flush = float('-inf')
+    async for token in tokens:
+        buf.append(token)
+        buf_len += len(token)
+        now = time.monotonic()
+        if buf_len >= _COALESCE_MIN_CHARS or now - last_flush > _COALESCE_MAX_DELAY_SECONDS:
+            yield "".join(buf)
+            buf.clear()
+            buf_len = 0
+            last_flush = now
+    if buf:
+        yield "".join(buf)
+
+
 def _stream_openai(messages: List[Dict[str, str]], model: str, temperature: float, max_tokens: int, api_key: str) -> Iterator[str]:
     """Stream tokens from OpenAI API"""
+    if openai is None:
+        logger.warning("OpenAI package not available, using fake stream")
+        yield from _fake_stream(messages)
+        return
+    
     try:
-        import openai
-        client = openai.OpenAI(api_key=api_key)
+        client = _get_client(api_key)
         
         stream = client.chat.completions.create(
             model=model,
@@ -105,22 +554,114 @@ def _stream_openai(messages: List[Dict[str, str]], model: str, temperature: floa
         )
         
         for chunk in stream:
+            # The SDK fixes the chunk schema, so read the delta directly on the hot path
             try:
-                if hasattr(chunk, 'choices') and chunk.choices:
-                    choice = chunk.choices[0]
-                    if hasattr(choice, 'delta') and hasattr(choice.delta, 'content'):
-                        content = choice.delta.content
-                        if content is not None and isinstance(content, str):
-                            yield content
-            except (AttributeError, IndexError, TypeError) as chunk_error:
+                content = chunk.choices[0].delta.content
+            except IndexError:
+                continue  # Chunks without choices (e.g. usage) carry no tokens
+            except (AttributeError, TypeError) as chunk_error:
                 logger.warning(f"Skipping malformed chunk in OpenAI stream: {chunk_error}")
                 continue
+            if content:
+                yield content
                 
         logger.info(f"Successfully streamed response from OpenAI model {model}")
         
-    except ImportError:
+    except Exception as e:
+        logger.error(f"OpenAI streaming error: {e}")
+        raise
+
+
+async def _stream_openai_async(messages: List[Dict[str, str]], model: str, temperature: float, max_tokens: int, api_key: str) -> AsyncIterator[str]:
+    """Stream tokens from OpenAI API on the running event loop"""
+    if openai is None:
         logger.warning("OpenAI package not available, using fake stream")
-        yield from _fake_stream(messages)
+        async for token in _fake_stream_async(messages):
+            yield token
+        return
+    
+    try:
+        client = _get_async_client(api_key)
+        
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        
+        async for chunk in stream:
+            # The SDK fixes the chunk schema, so read the delta directly on the hot path
+            try:
+                content = chunk.choices[0].delta.content
+            except IndexError:
+                continue  # Chunks without choices (e.g. usage) carry no tokens
+            except (AttributeError, TypeError) as chunk_error:
+                logger.warning(f"Skipping malformed chunk in OpenAI stream: {chunk_error}")
+                continue
+            if content:
+                yield content
+                
+        logger.info(f"Successfully streamed response from OpenAI model {model}")
+        
+    except Exception as e:
+        logger.error(f"OpenAI streaming error: {e}")
+        raise
+
+
+async def _stream_openai_aiohttp(messages: List[Dict[str, str]], model: str, temperature: float, max_tokens: int, api_key: str) -> AsyncIterator[str]:
+    """Stream tokens from OpenAI API with a direct aiohttp POST, parsing the SSE frames here"""
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stream": True
+    }
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    
+    body = orjson.dumps(payload)
+    
+    try:
+        session = _get_aiohttp_session()
+        
+        # Retry only the request itself, so a retry never repeats streamed tokens
+        for attempt in range(OPENAI_CHAT_MAX_ATTEMPTS):
+            is_last = attempt == OPENAI_CHAT_MAX_ATTEMPTS - 1
+            try:
+                resp = await session.post(_OPENAI_CHAT_URL, data=body, headers=headers)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if is_last:
+                    raise
+                logger.warning(f"OpenAI request failed: {e}, retrying")
+            else:
+                if resp.status not in _RETRY_STATUSES or is_last:
+                    break
+                resp.release()
+                logger.warning(f"OpenAI request returned {resp.status}, retrying")
+            await asyncio.sleep(_retry_delay(attempt))
+        
+        async with resp:
+            resp.raise_for_status()
+            async for line in resp.content:
+                if not line.startswith(_SSE_DATA_PREFIX):
+                    continue
+                data = line[len(_SSE_DATA_PREFIX):].strip()
+                if data == _SSE_DONE:
+                    break
+                
+                choices = orjson.loads(data).get("choices")
+                if choices:
+                    content = choices[0].get("delta", {}).get("content")
+                    if content:
+                        yield content
+        
+        logger.info(f"Successfully streamed response from OpenAI model {model} via aiohttp")
+        
     except Exception as e:
         logger.error(f"OpenAI streaming error: {e}")
         raise
@@ -128,9 +669,12 @@ def _stream_openai(messages: List[Dict[str, str]], model: str, temperature: floa
 
 def _complete_openai(messages: List[Dict[str, str]], model: str, temperature: float, max_tokens: int, api_key: str) -> str:
     """Get complete response from OpenAI API"""
+    if openai is None:
+        logger.warning("OpenAI package not available, using fake completion")
+        return _fake_complete(messages)
+    
     try:
-        import openai
-        client = openai.OpenAI(api_key=api_key)
+        client = _get_client(api_key)
         
         response = client.chat.completions.create(
             model=model,
@@ -143,53 +687,47 @@ def _complete_openai(messages: List[Dict[str, str]], model: str, temperature: fl
         logger.info(f"Successfully completed response from OpenAI model {model}")
         return content or ""
         
-    except ImportError:
-        logger.warning("OpenAI package not available, using fake completion")
-        return _fake_complete(messages)
     except Exception as e:
         logger.error(f"OpenAI completion error: {e}")
         raise
 
 
+def _last_user_message(messages: List[Dict[str, str]]) -> str:
+    """Content of the last user message, or an empty string if there is none"""
+    # The user usually spoke last, so check that before scanning backwards
+    if messages and messages[-1].get('role') == 'user':
+        return messages[-1].get('content', '')
+    return next((msg.get('content', '') for msg in reversed(messages) if msg.get('role') == 'user'), '')
+
+
+def _fake_response_parts(messages: List[Dict[str, str]]) -> Iterator[str]:
+    """Yield the deterministic fake response for development, one stream part at a time"""
+    # Create deterministic response based on last user message
+    last_user_message = _last_user_message(messages)
+    
+    # Simulate a realistic response; only the query line varies per call
+    yield from _FAKE_PREFIX
+    yield f"Based on the query '{last_user_message[:50]}...', here's a summary of key findings.\n\n"
+    yield from _FAKE_SUFFIX
+
+
 def _fake_stream(messages: List[Dict[str, str]]) -> Iterator[str]:
     """Generate a deterministic fake stream for development"""
-    # Create deterministic response based on last user message
-    last_user_message = ""
-    for msg in reversed(messages):
-        if msg.get('role') == 'user':
-            last_user_message = msg.get('content', '')
-            break
-    
-    # Generate deterministic response based on hash of input
-    seed = hashlib.sha256(last_user_message.encode()).hexdigest()[:8]
-    
-    # Simulate a realistic response
-    response_parts = [
-        "## TL;DR\n\n",
-        f"Based on the query '{last_user_message[:50]}...', here's a summary of key findings.\n\n",
-        "## What happened\n\n",
-        "Recent developments indicate ongoing changes in the situation. ",
-        "Multiple sources report significant activity in the area [1]. ",
-        "Key stakeholders have provided statements [2].\n\n",
-        "## Why it matters\n\n",
-        "This development has implications for future policy decisions. ",
-        "The impact extends beyond immediate concerns [3].\n\n",
-        "## Unknowns\n\n",
-        "Several questions remain unanswered about long-term effects.\n\n",
-        "## Timeline\n\n",
-        "- Recent: Initial reports emerged\n",
-        "- Current: Ongoing assessment\n",
-        "- Future: Further developments expected\n\n",
-        "## Sources\n\n",
-        "[1] Example Source 1 (example.com)\n",
-        "[2] Example Source 2 (news.example.com)\n",
-        "[3] Example Source 3 (analysis.example.com)\n"
-    ]
-    
-    # Stream the parts with realistic delays
-    for part in response_parts:
+    # Stream the parts, pausing only when a delay is configured
+    for part in _fake_response_parts(messages):
         yield part
-        time.sleep(0.1)  # Simulate network delay
+        if _FAKE_DELAY_SECONDS:
+            time.sleep(_FAKE_DELAY_SECONDS)
+    
+    logger.info("Generated fake streaming response")
+
+
+async def _fake_stream_async(messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+    """Generate the deterministic fake stream without blocking the event loop"""
+    for part in _fake_response_parts(messages):
+        yield part
+        # Yields to the loop between parts even with no delay configured
+        await asyncio.sleep(_FAKE_DELAY_SECONDS)
     
     logger.info("Generated fake streaming response")
 
@@ -197,19 +735,13 @@ def _fake_stream(messages: List[Dict[str, str]]) -> Iterator[str]:
 def _fake_complete(messages: List[Dict[str, str]]) -> str:
     """Generate a deterministic fake completion for development"""
     # For planning or summary tasks, return a simple response
-    last_user_message = ""
-    for msg in reversed(messages):
-        if msg.get('role') == 'user':
-            last_user_message = msg.get('content', '')
-            break
-    
-    if "plan" in last_user_message.lower():
-        return """• Analyze the query and available information
-• Identify key facts and developments
-• Determine significance and implications
-• Note any gaps or unknowns
-• Structure findings clearly"""
-    elif "summarize" in last_user_message.lower():
-        return "Previous discussion covered recent developments and their implications for stakeholders."
+    last_user_message = _last_user_message(messages)
+    
+    # Task keywords sit at the start of the prompt, so classify a lowercased prefix once
+    text_lower = last_user_message[:_FAKE_CLASSIFY_CHARS].lower()
+    if any(keyword in text_lower for keyword in _PLAN_KEYWORDS):
+        return _FAKE_PLAN_RESPONSE
+    elif any(keyword in text_lower for keyword in _SUMMARY_KEYWORDS):
+        return _FAKE_SUMMARY_RESPONSE
     else:
-        return "I understand your request and will provide a comprehensive response based on available information."
\ No newline at end of file
+        return _FAKE_DEFAULT_RESPONSE
\ No newline at end of file
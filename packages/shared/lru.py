@@ -0,0 +1,67 @@
+"""Thread-safe in-process LRU cache with an optional TTL, shared by the embedding and completion caches"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, List, Optional, Tuple
+
+
+class TTLCache:
+    """LRU mapping whose entries also expire ttl_seconds after being stored (None keeps them until evicted)"""
+    
+    def __init__(self, maxsize: int, ttl_seconds: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired"""
+        return self.get_many([key])[0]
+    
+    def get_many(self, keys: Iterable[Hashable]) -> List[Optional[Any]]:
+        """
+        Look up several keys under one lock acquisition.
+    
+        Args:
+            keys: Keys to look up
+    
+        Returns:
+            Cached values in the same order as keys, None for misses and expired entries
+        """
+        now = time.monotonic()
+        values: List[Optional[Any]] = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    values.append(None)
+                elif self.ttl_seconds is not None and now - entry[0] >= self.ttl_seconds:
+                    del self._entries[key]
+                    values.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    values.append(entry[1])
+        return values
+    
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries beyond maxsize"""
+        self.put_many([(key, value)])
+    
+    def put_many(self, items: Iterable[Tuple[Hashable, Any]]) -> None:
+        """Store several (key, value) pairs under one lock acquisition"""
+        now = time.monotonic()
+        with self._lock:
+            for key, value in items:
+                self._entries[key] = (now, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,16 @@
+"""Shared test setup, applied once before any test module is imported"""
+
+import os
+import sys
+
+_TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Project root for apps.* / packages.* imports, and the API directory for its
+# top-level modules (main, core, routes, ...); prepended so they win over site-packages
+for _path in (os.path.join(_TESTS_DIR, '..'), os.path.join(_TESTS_DIR, '../apps/api')):
+    _path = os.path.normpath(_path)
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+# Tests exercise the fake LLM and deterministic embedding fallbacks
+os.environ.pop('OPENAI_API_KEY', None)
@@ -1,18 +1,10 @@
 """Tests for chat fallback when OPENAI_API_KEY is missing"""
 
 import os
+import orjson
 import pytest
 from fastapi.testclient import TestClient
 import tempfile
-import sys
-
-# Ensure OPENAI_API_KEY is not set for these tests
-if 'OPENAI_API_KEY' in os.environ:
-    del os.environ['OPENAI_API_KEY']
-
-# Add project paths
-sys.path.append(os.path.join(os.path.dirname(__file__), '../apps/api'))
-sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
 
 from apps.api.main import app
 
@@ -70,10 +62,9 @@ def test_chat_response_structure():
             event_type = lines[i][7:]  # Remove "event: "
             if i + 1 < len(lines) and lines[i + 1].startswith('data: '):
                 try:
-                    import json
-                    data = json.loads(lines[i + 1][6:])  # Remove "data: "
+                    data = orjson.loads(lines[i + 1][6:])  # Remove "data: "
                     events.append({"type": event_type, "data": data})
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     pass
         i += 1
     
@@ -127,11 +118,10 @@ def test_fake_streaming_deterministic():
     for line in lines:
         if line.startswith('data: '):
             try:
-                import json
-                data = json.loads(line[6:])
+                data = orjson.loads(line[6:])
                 if 'token' in data:
                     full_response += data['token']
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 pass
     
     # Should produce a reasonable response with sections
@@ -0,0 +1,63 @@
+"""Tests for the shared embedding helpers"""
+
+import hashlib
+import numpy as np
+import pytest
+
+from packages.shared import embedding
+from apps.api.shared import embedding as api_embedding
+
+
+def test_disk_format_round_trip():
+    """Test that cached vectors survive the on-disk format with negligible error"""
+    rng = np.random.default_rng(0)
+    vector = rng.standard_normal(embedding.EMBEDDING_DIM).astype(np.float32)
+    vector /= np.linalg.norm(vector)
+    
+    data = embedding._pack_f16(vector)
+    assert len(data) == 2 * embedding.EMBEDDING_DIM  # Half the float32 footprint
+    
+    restored = embedding._unpack_f16(data)
+    assert restored.dtype == np.float32
+    assert restored.shape == vector.shape
+    
+    # A warm disk cache must rank like fresh vectors
+    cosine = float(restored @ vector) / float(np.linalg.norm(restored))
+    assert 1.0 - cosine < 1e-6
+    assert np.max(np.abs(restored - vector)) < 1e-3
+
+
+def test_deterministic_paths_identical(monkeypatch):
+    """Test that the Numba kernel and the NumPy fallback generate identical vectors"""
+    if embedding.njit is None:
+        pytest.skip("Numba not installed")
+    
+    texts = [f"Article chunk {i}" for i in range(64)] + ["", "   ", "Article chunk 0"]
+    compiled = embedding._embed_deterministic(texts)
+    
+    monkeypatch.setattr(embedding, "_fill_normalized", embedding._fill_normalized_numpy)
+    fallback = embedding._embed_deterministic(texts)
+    
+    # Bit-identical, so cached fallback vectors never depend on whether Numba is installed
+    assert np.array_equal(compiled, fallback)
+    np.testing.assert_allclose(np.linalg.norm(compiled[:64], axis=1), 1.0, rtol=1e-5)
+
+
+def test_api_fallback_paths_identical():
+    """Test that the API's Numba kernel and NumPy fallback generate identical vectors"""
+    if api_embedding.njit is None:
+        pytest.skip("Numba not installed")
+    
+    texts = [f"Query {i}" for i in range(64)] + ["Query 0"]
+    seeds = np.frombuffer(
+        b''.join(hashlib.blake2b(text.encode(), digest_size=8).digest() for text in texts),
+        dtype=np.uint64
+    )
+    compiled = np.empty((len(texts), api_embedding.EMBEDDING_DIM), dtype=np.float32)
+    fallback = np.empty_like(compiled)
+    
+    api_embedding._fill_normalized(seeds, compiled)
+    api_embedding._fill_normalized_numpy(seeds, fallback)
+    
+    assert np.array_equal(compiled, fallback)
+    np.testing.assert_allclose(np.linalg.norm(compiled, axis=1), 1.0, rtol=1e-6)
@@ -3,10 +3,6 @@ Test health endpoints
 """
 import pytest
 from fastapi.testclient import TestClient
-import sys
-import os
-
-sys.path.append(os.path.join(os.path.dirname(__file__), '../apps/api'))
 
 from main import app
 
@@ -3,76 +3,93 @@
 import os
 import pytest
 import tempfile
-import sys
 from unittest.mock import patch
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
 
-# Ensure OPENAI_API_KEY is not set for fallback tests
-if 'OPENAI_API_KEY' in os.environ:
-    del os.environ['OPENAI_API_KEY']
-
-# Add project paths
-sys.path.append(os.path.join(os.path.dirname(__file__), '../apps/api'))
-sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
-
-# Set up test database URL
-test_db_url = "sqlite:///test_memory.db"
+# Set up test database URL (in memory, so no statement touches the disk)
+test_db_url = "sqlite+pysqlite:///:memory:"
 os.environ['DATABASE_URL'] = test_db_url
 
 from apps.api.memory.store import (
-    start_conversation, append_message, get_recent_messages,
-    get_summary, set_summary, conversation_exists
+    start_conversation, append_message, bulk_append_messages, get_recent_messages,
+    get_summary, set_summary, conversation_exists, _RECENT_MESSAGES_SQL
 )
 from apps.api.memory.summarize import summarize_short
 
 
-@pytest.fixture
-def test_db():
-    """Create test database and session"""
-    engine = create_engine(test_db_url, connect_args={"check_same_thread": False})
-    SessionLocal = sessionmaker(bind=engine)
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY DEFAULT (hex(randomblob(16))),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conversation_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (conversation_id) REFERENCES conversations (id)
+);
+CREATE INDEX IF NOT EXISTS idx_messages_conv_id ON messages (conversation_id, id DESC);
+
+CREATE TABLE IF NOT EXISTS conversation_memory (
+    conversation_id TEXT PRIMARY KEY,
+    short_summary TEXT,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (conversation_id) REFERENCES conversations (id)
+);
+"""
+
+
+@pytest.fixture(scope="session")
+def engine():
+    """Create the in-memory test database and its schema once per session"""
+    # StaticPool hands every session the same connection, and so the same in-memory database
+    engine = create_engine(
+        test_db_url,
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+        query_cache_size=1200
+    )
     
-    # Create tables
-    with engine.connect() as conn:
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS conversations (
-                id TEXT PRIMARY KEY DEFAULT (hex(randomblob(16))),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """))
-        
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                conversation_id TEXT NOT NULL,
-                role TEXT NOT NULL,
-                content TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (conversation_id) REFERENCES conversations (id)
-            )
-        """))
-        
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS conversation_memory (
-                conversation_id TEXT PRIMARY KEY,
-                short_summary TEXT,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (conversation_id) REFERENCES conversations (id)
-            )
-        """))
-        
-        conn.commit()
-    
-    session = SessionLocal()
-    yield session
-    session.close()
+    # pysqlite defers BEGIN and mishandles SAVEPOINT; let SQLAlchemy emit BEGIN itself
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, _):
+        dbapi_connection.isolation_level = None
+        # 64 MB page cache and in-memory temp tables for sorts and windows
+        dbapi_connection.execute("PRAGMA cache_size=-64000")
+        dbapi_connection.execute("PRAGMA temp_store=MEMORY")
     
-    # Clean up
+    @event.listens_for(engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+    
+    # Create tables in one script on the pooled connection; a separate
+    # sqlite3.connect() would open a different in-memory database
+    raw = engine.raw_connection()
     try:
-        os.remove("test_memory.db")
-    except FileNotFoundError:
-        pass
+        raw.driver_connection.executescript(SCHEMA_SQL)
+    finally:
+        raw.close()
+    
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def test_db(engine):
+    """Session inside a per-test transaction that is rolled back afterwards"""
+    conn = engine.connect()
+    trans = conn.begin()
+    # The store's commits only release savepoints, so nothing outlives the test
+    session = Session(bind=conn, join_transaction_mode="create_savepoint")
+    yield session
+    session.close()
+    trans.rollback()
+    conn.close()
 
 
 def test_conversation_lifecycle(test_db):
@@ -91,8 +108,9 @@ def test_conversation_lifecycle(test_db):
     append_message(test_db, conv_id, "assistant", "Climate change refers to long-term changes in global temperatures.")
     
     # Get recent messages
-    messages = get_recent_messages(test_db, conv_id, limit=5)
+    messages, total = get_recent_messages(test_db, conv_id, limit=5)
     assert len(messages) == 2
+    assert total == 2
     assert messages[0]['role'] == 'user'
     assert messages[0]['content'] == "Hello, what is climate change?"
     assert messages[1]['role'] == 'assistant'
@@ -174,57 +192,87 @@ def test_message_limits(test_db):
     """Test message retrieval limits"""
     conv_id = start_conversation(test_db)
     
-    # Add many messages
-    for i in range(10):
-        append_message(test_db, conv_id, "user", f"Message {i}")
-        append_message(test_db, conv_id, "assistant", f"Response {i}")
+    # Add many messages in one batch
+    bulk_append_messages(test_db, conv_id, [
+        message
+        for i in range(10)
+        for message in (
+            {"role": "user", "content": f"Message {i}"},
+            {"role": "assistant", "content": f"Response {i}"}
+        )
+    ])
     
     # Get limited messages
-    recent_3 = get_recent_messages(test_db, conv_id, limit=3)
+    recent_3, total = get_recent_messages(test_db, conv_id, limit=3)
     assert len(recent_3) == 3
+    assert total == 20  # Counted before the limit is applied
     
     # Should get the most recent ones
     assert "Message 9" in recent_3[1]['content']  # Most recent user message
     assert "Response 9" in recent_3[2]['content']  # Most recent assistant message
     
     # Get all messages
-    all_messages = get_recent_messages(test_db, conv_id, limit=100)
+    all_messages, total = get_recent_messages(test_db, conv_id, limit=100)
     assert len(all_messages) == 20  # 10 user + 10 assistant
+    assert total == 20
     
     print("✅ Message limits work correctly")
 
 
+def test_message_cursor_paging(test_db):
+    """Test keyset paging backwards through a conversation"""
+    conv_id = start_conversation(test_db)
+    bulk_append_messages(test_db, conv_id, [
+        {"role": "user", "content": f"Message {i}"} for i in range(10)
+    ])
+    
+    # Walk back from the latest message, four at a time
+    pages = []
+    before_id = None
+    while True:
+        page, remaining = get_recent_messages(test_db, conv_id, limit=4, before_id=before_id)
+        if not page:
+            assert remaining == 0
+            break
+        pages.append(page)
+        before_id = page[0]['id']
+    
+    assert [len(page) for page in pages] == [4, 4, 2]
+    
+    # Pages are chronological internally and contiguous, with no gaps or repeats
+    contents = [m['content'] for page in reversed(pages) for m in page]
+    assert contents == [f"Message {i}" for i in range(10)]
+    
+    # A cursor is stable across later appends
+    append_message(test_db, conv_id, "assistant", "Late reply")
+    page, remaining = get_recent_messages(test_db, conv_id, limit=4, before_id=pages[1][0]['id'])
+    assert [m['content'] for m in page] == ["Message 0", "Message 1"]
+    assert remaining == 2
+    
+    print("✅ Cursor paging works correctly")
+
+
+def test_recent_messages_use_index(test_db):
+    """Test that recent-message reads search the composite index instead of scanning"""
+    # Explain the statement get_recent_messages actually runs, so the test tracks it
+    plan = test_db.execute(
+        text("EXPLAIN QUERY PLAN " + _RECENT_MESSAGES_SQL.text),
+        {"conversation_id": "0" * 32, "before_id": 100, "limit": 8}
+    ).fetchall()
+    details = " ".join(row[-1] for row in plan)
+    
+    assert "SEARCH messages USING INDEX idx_messages_conv_id" in details
+    assert "SCAN messages" not in details
+
+
 if __name__ == "__main__":
     # Create a test database session for standalone testing
-    engine = create_engine("sqlite:///test_standalone.db")
+    engine = create_engine(test_db_url, poolclass=StaticPool, connect_args={"check_same_thread": False})
     SessionLocal = sessionmaker(bind=engine)
     
-    with engine.connect() as conn:
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS conversations (
-                id TEXT PRIMARY KEY DEFAULT (hex(randomblob(16))),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """))
-        
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                conversation_id TEXT NOT NULL,
-                role TEXT NOT NULL,
-                content TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """))
-        
-        conn.execute(text("""
-            CREATE TABLE IF NOT EXISTS conversation_memory (
-                conversation_id TEXT PRIMARY KEY,
-                short_summary TEXT,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """))
-        conn.commit()
+    raw = engine.raw_connection()
+    raw.driver_connection.executescript(SCHEMA_SQL)
+    raw.close()
     
     test_db = SessionLocal()
     
@@ -234,10 +282,9 @@ if __name__ == "__main__":
         test_memory_summarization_fallback()
         test_memory_summarization_edge_cases()
         test_message_limits(test_db)
+        test_message_cursor_paging(test_db)
+        test_recent_messages_use_index(test_db)
         print("\n🎉 All memory tests passed!")
     finally:
         test_db.close()
-        try:
-            os.remove("test_standalone.db")
-        except FileNotFoundError:
-            pass
\ No newline at end of file
+        engine.dispose()
\ No newline at end of file